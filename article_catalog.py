@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""docs 配下の記事を SQLite のカタログに記録し、スクリプトや macros から問い合わせるためのモジュール。
+
+- 記事毎にパス・カテゴリ (フォルダ)・ファイル名の日付・front matter の日付・タイトル・memo の有無と長さを保持する
+- `sync` は .md / .memo の (mtime, size) を前回と比べ、変わった記事だけを読み直す
+- カタログは docs_dir の外 (`.cache/articles.sqlite3`) に置く
+- 「memo が無い記事」「カテゴリ毎の最新 N 件」などをファイルシステムを走査せずに返す
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from plugins.page_meta import date_from_filename, file_signature, memo_path_for, parse_page, read_memo
+from update_root_pages import CATEGORY_EXCLUDE, extract_category_from_pages
+
+CACHE_DIRNAME = ".cache"
+CATALOG_FILENAME = "articles.sqlite3"
+SCHEMA_VERSION = "1"
+
+# 一覧の並びに使う日付。macros の resolve_page_date と同じく、ファイル名の日付が無ければ front matter の date
+SORT_DATE = "COALESCE(file_date, substr(front_date, 1, 10))"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    path TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    file_date TEXT,
+    front_date TEXT,
+    title TEXT NOT NULL DEFAULT '',
+    heading TEXT NOT NULL DEFAULT '',
+    md_mtime_ns INTEGER NOT NULL,
+    md_size INTEGER NOT NULL,
+    memo_mtime_ns INTEGER,
+    memo_size INTEGER,
+    has_memo INTEGER NOT NULL,
+    memo TEXT,
+    memo_length REAL
+);
+CREATE INDEX IF NOT EXISTS articles_file_date ON articles (file_date);
+CREATE INDEX IF NOT EXISTS articles_category_date ON articles (category, file_date);
+CREATE INDEX IF NOT EXISTS articles_has_memo ON articles (has_memo);
+CREATE TABLE IF NOT EXISTS folders (
+    name TEXT PRIMARY KEY,
+    pages_mtime_ns INTEGER,
+    pages_size INTEGER,
+    category_title TEXT
+);
+"""
+
+
+@dataclass
+class SyncStats:
+    scanned: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+    def format(self) -> str:
+        return (
+            f"scanned {self.scanned}, added {self.added}, updated {self.updated}, "
+            f"removed {self.removed}, unchanged {self.unchanged} in {self.seconds * 1000:.1f} ms"
+        )
+
+
+def catalog_path_for(docs_dir: Path) -> Path:
+    return docs_dir.parent / CACHE_DIRNAME / CATALOG_FILENAME
+
+
+def load_length_rule(docs_dir: Path) -> Optional[Callable[[str], float]]:
+    """docs/memo_rules.py の weighted_length を読み込む (memo の長さの定義はそちらに一本化している)。"""
+    rules_path = docs_dir / "memo_rules.py"
+    spec = importlib.util.spec_from_file_location("memo_rules", rules_path)
+    if spec is None or spec.loader is None or not rules_path.is_file():
+        return None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.weighted_length
+
+
+def iter_markdown(docs_dir: Path) -> Iterator[Tuple[str, str]]:
+    """docs_dir 以下の .md を (docs からの相対パス, 絶対パス) で返す。'.' で始まるフォルダは除く。"""
+    for current, dirs, files in os.walk(docs_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.endswith(".md"):
+                abs_path = os.path.join(current, name)
+                yield Path(os.path.relpath(abs_path, docs_dir)).as_posix(), abs_path
+
+
+class ArticleCatalog:
+    def __init__(self, docs_dir: Path, db_path: Optional[Path] = None):
+        self.docs_dir = Path(docs_dir).resolve()
+        self.db_path = Path(db_path) if db_path else catalog_path_for(self.docs_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self._ensure_schema()
+        self._length_rule = load_length_rule(self.docs_dir)
+
+    def _ensure_schema(self) -> None:
+        row = None
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        except sqlite3.OperationalError:
+            pass
+        if row is not None and row[0] != SCHEMA_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS articles; DROP TABLE IF EXISTS folders;")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def memo_fields(self, memo_path: str, memo_sig) -> Dict:
+        memo = read_memo(memo_path) if memo_sig is not None else None
+        length = self._length_rule(memo) if memo is not None and self._length_rule else None
+        return {
+            "memo_mtime_ns": memo_sig[0] if memo_sig else None,
+            "memo_size": memo_sig[1] if memo_sig else None,
+            "has_memo": int(bool(memo and memo.strip())),
+            "memo": memo,
+            "memo_length": length,
+        }
+
+    def sync(self) -> SyncStats:
+        """docs_dir と比べてカタログを更新する。(mtime, size) が同じ記事は読まない。"""
+        stats = SyncStats()
+        started = time.perf_counter()
+        known = {
+            row["path"]: (row["md_mtime_ns"], row["md_size"], row["memo_mtime_ns"], row["memo_size"])
+            for row in self.conn.execute(
+                "SELECT path, md_mtime_ns, md_size, memo_mtime_ns, memo_size FROM articles"
+            )
+        }
+        seen = set()
+        with self.conn:
+            for rel_path, abs_path in iter_markdown(self.docs_dir):
+                stats.scanned += 1
+                seen.add(rel_path)
+                md_sig = file_signature(abs_path)
+                if md_sig is None:
+                    continue
+                memo_path = memo_path_for(abs_path)
+                memo_sig = file_signature(memo_path)
+                previous = known.get(rel_path)
+                memo_key = (memo_sig[0], memo_sig[1]) if memo_sig else (None, None)
+                if previous and previous[:2] == tuple(md_sig) and previous[2:] == memo_key:
+                    stats.unchanged += 1
+                    continue
+
+                fields = self.memo_fields(memo_path, memo_sig)
+                if previous and previous[:2] == tuple(md_sig):
+                    assignments = ", ".join(f"{name} = :{name}" for name in fields)
+                    self.conn.execute(f"UPDATE articles SET {assignments} WHERE path = :path", {**fields, "path": rel_path})
+                    stats.updated += 1
+                    continue
+
+                meta = parse_page(abs_path)
+                fields.update({
+                    "path": rel_path,
+                    "category": rel_path.split("/", 1)[0] if "/" in rel_path else "",
+                    "file_date": date_from_filename(rel_path),
+                    "front_date": meta.date,
+                    "title": meta.title,
+                    "heading": meta.heading,
+                    "md_mtime_ns": md_sig[0],
+                    "md_size": md_sig[1],
+                })
+                columns = ", ".join(fields)
+                placeholders = ", ".join(f":{name}" for name in fields)
+                self.conn.execute(f"INSERT OR REPLACE INTO articles ({columns}) VALUES ({placeholders})", fields)
+                if previous:
+                    stats.updated += 1
+                else:
+                    stats.added += 1
+
+            removed = [path for path in known if path not in seen]
+            self.conn.executemany("DELETE FROM articles WHERE path = ?", [(path,) for path in removed])
+            stats.removed = len(removed)
+            self._sync_folders()
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _sync_folders(self) -> None:
+        known = {
+            row["name"]: (row["pages_mtime_ns"], row["pages_size"])
+            for row in self.conn.execute("SELECT name, pages_mtime_ns, pages_size FROM folders")
+        }
+        seen = set()
+        with os.scandir(self.docs_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or entry.name in CATEGORY_EXCLUDE or not entry.is_dir():
+                    continue
+                seen.add(entry.name)
+                pages_path = Path(entry.path) / ".pages"
+                sig = file_signature(str(pages_path))
+                key = tuple(sig) if sig else (None, None)
+                if known.get(entry.name) == key:
+                    continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO folders (name, pages_mtime_ns, pages_size, category_title) VALUES (?, ?, ?, ?)",
+                    (entry.name, key[0], key[1], extract_category_from_pages(pages_path)),
+                )
+        self.conn.executemany("DELETE FROM folders WHERE name = ?", [(name,) for name in known if name not in seen])
+
+    # ---- queries -------------------------------------------------------
+
+    def missing_memos(self) -> List[str]:
+        rows = self.conn.execute("SELECT path FROM articles WHERE memo_size IS NULL ORDER BY path")
+        return [row["path"] for row in rows]
+
+    def latest(self, limit: int) -> List[sqlite3.Row]:
+        """SORT_DATE の新しい順に limit 件返す。limit 件目と同じ日付の記事もすべて含める。"""
+        return self.conn.execute(
+            f"""
+            SELECT * FROM (SELECT *, {SORT_DATE} AS sort_date FROM articles)
+            WHERE sort_date >= COALESCE((
+                SELECT {SORT_DATE} AS sort_date FROM articles WHERE sort_date IS NOT NULL
+                ORDER BY sort_date DESC LIMIT 1 OFFSET ?
+            ), '')
+            ORDER BY sort_date DESC, path
+            """,
+            (limit - 1,),
+        ).fetchall() if limit > 0 else []
+
+    def latest_per_category(self, per_category: int) -> List[sqlite3.Row]:
+        """カテゴリ (フォルダ) 毎に SORT_DATE の新しい順で per_category 件ずつ返す。
+
+        日付だけで順位を付けるので、境界と同じ日付の記事はすべて含める (同じ日付の中の並びは呼び出し側で決める)。
+        """
+        return self.conn.execute(
+            f"""
+            SELECT * FROM (
+                SELECT articles.*, folders.category_title, {SORT_DATE} AS sort_date,
+                       RANK() OVER (PARTITION BY articles.category ORDER BY {SORT_DATE} DESC) AS rank
+                FROM articles LEFT JOIN folders ON folders.name = articles.category
+                WHERE {SORT_DATE} IS NOT NULL
+            )
+            WHERE rank <= ?
+            ORDER BY category, rank, path
+            """,
+            (per_category,),
+        ).fetchall()
+
+    def memo_lengths_outside(self, minimum: float, maximum: float) -> List[sqlite3.Row]:
+        return self.conn.execute(
+            "SELECT path, memo_length FROM articles WHERE memo_length IS NOT NULL "
+            "AND (memo_length < ? OR memo_length > ?) ORDER BY path",
+            (minimum, maximum),
+        ).fetchall()
+
+    def date_mismatches(self) -> List[sqlite3.Row]:
+        """ファイル名の日付と front matter の date が食い違う (または date が無い) 記事。"""
+        return self.conn.execute(
+            "SELECT path, file_date, front_date FROM articles WHERE file_date IS NOT NULL "
+            "AND (front_date IS NULL OR substr(front_date, 1, 10) != file_date) ORDER BY path"
+        ).fetchall()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain and query the SQLite article catalog.")
+    parser.add_argument("command", choices=["sync", "missing", "latest", "lengths", "dates"])
+    parser.add_argument("docs_dir", nargs="?", default="docs", help="MkDocs docs directory")
+    parser.add_argument("--db", help="Catalog path (default: .cache/articles.sqlite3 next to docs_dir)")
+    parser.add_argument("--no-sync", action="store_true", help="Query without syncing the catalog first")
+    parser.add_argument("--limit", type=int, default=5, help="Rows per category for 'latest'")
+    parser.add_argument("--min", type=float, default=65.0, help="Minimum memo length for 'lengths'")
+    parser.add_argument("--max", type=float, default=80.0, help="Maximum memo length for 'lengths'")
+    args = parser.parse_args()
+
+    docs_dir = Path(args.docs_dir).resolve()
+    if not docs_dir.is_dir():
+        raise SystemExit(f"Docs directory not found: {docs_dir}")
+
+    catalog = ArticleCatalog(docs_dir, Path(args.db) if args.db else None)
+    try:
+        if args.command == "sync" or not args.no_sync:
+            stats = catalog.sync()
+            print(f"[SYNC] {stats.format()}", file=sys.stderr)
+        if args.command == "missing":
+            for path in catalog.missing_memos():
+                print(path)
+        elif args.command == "latest":
+            for row in catalog.latest_per_category(args.limit):
+                print(f"{row['category']}\t{row['sort_date']}\t{row['path']}")
+        elif args.command == "lengths":
+            for row in catalog.memo_lengths_outside(args.min, args.max):
+                print(f"{row['path']}\t{row['memo_length']}")
+        elif args.command == "dates":
+            for row in catalog.date_mismatches():
+                print(f"{row['path']}\t{row['file_date']}\t{row['front_date']}")
+    finally:
+        catalog.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
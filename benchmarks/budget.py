@@ -0,0 +1,209 @@
+"""サイトをプロファイラ付きでビルドし、コミット済みの基準値と比べて予算を超えたら失敗する。
+
+    python -m benchmarks.budget            # mkdocs.yml をビルドして benchmarks/baseline.json と比べる
+    python -m benchmarks.budget --update   # 今回の値で基準値を書き換える (予算の設定はそのまま)
+
+render_cache 等のキャッシュの状態で結果が変わらないよう、計る間は mkdocs.yml の隣の `.cache/` を退避し、
+空の `.cache/` から 1 回目 (cold) をビルドして、続けて同じキャッシュで 2 回目 (warm) をビルドする。
+退避した `.cache/` は終わったら元に戻す (計っている間は同じ場所で `mkdocs serve` 等を動かさないこと)。
+
+計る値 (複数回ビルドしたときは中央値):
+- wall_seconds: cold ビルドの `mkdocs build` のプロセス全体の経過時間
+- peak_rss_kb: cold ビルドのプロセスの最大 RSS
+- pages_per_second: ページ数 / wall_seconds
+- hooks_seconds: cold ビルドでの hooks.py のイベントハンドラの合計時間
+- macros_seconds: cold ビルドでの macros/home.py のマクロ (latest_pages / home_sections) の合計時間
+- warm_wall_seconds / warm_pages_per_second: warm ビルドの同じ値
+
+予算は基準値からの悪化の割合 (`relative`) と、小さな値の揺れを吸収する下限 (`absolute`) で指定し、
+悪化が max(基準値 x relative, absolute) を超えたら違反とする。
+基準値はマシンに依存するので、更新するときは CI と同じ環境で `--update` すること。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+BASELINE_VERSION = 1
+MACROS_MODULE = "macros.home"
+HOOKS_FILENAME = "hooks.py"
+CACHE_DIRNAME = ".cache"
+# warm ビルドでも比べる値 (warm_ を付けて記録する)
+WARM_METRICS = ("wall_seconds", "pages_per_second")
+
+# 大きいほど良い値。それ以外は小さいほど良い
+HIGHER_IS_BETTER = {"pages_per_second", "warm_pages_per_second"}
+DEFAULT_BUDGETS: Dict[str, Dict[str, float]] = {
+    "wall_seconds": {"relative": 0.25, "absolute": 1.0},
+    "peak_rss_kb": {"relative": 0.15, "absolute": 10240},
+    "pages_per_second": {"relative": 0.2, "absolute": 2.0},
+    "hooks_seconds": {"relative": 0.5, "absolute": 0.05},
+    "macros_seconds": {"relative": 0.5, "absolute": 0.05},
+    "warm_wall_seconds": {"relative": 0.25, "absolute": 1.0},
+    "warm_pages_per_second": {"relative": 0.2, "absolute": 2.0},
+}
+
+
+@contextmanager
+def fresh_cache(project_dir: Path) -> Iterator[Path]:
+    """プロジェクトの .cache を退避して空の .cache でビルドさせ、終わったら元に戻す。"""
+    cache_dir = project_dir / CACHE_DIRNAME
+    stash_dir = project_dir / f"{CACHE_DIRNAME}.budget-{os.getpid()}"
+    if cache_dir.exists():
+        cache_dir.rename(stash_dir)
+    try:
+        yield cache_dir
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        if stash_dir.exists():
+            stash_dir.rename(cache_dir)
+
+
+def run_build(config_path: Path) -> Dict[str, float]:
+    """build_profiler を有効にして 1 回ビルドし、予算で見る値を返す。"""
+    report_path = config_path.resolve().parent / ".cache" / "profile" / "build_profile.json"
+    report_path.unlink(missing_ok=True)
+    env = dict(os.environ, MKDOCS_PROFILE="true")
+    with tempfile.TemporaryDirectory(prefix="mkdocs-budget-") as site_dir:
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "mkdocs", "build", "-q", "-f", str(config_path), "-d", site_dir],
+            cwd=config_path.resolve().parent,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise SystemExit(f"mkdocs build failed ({completed.returncode}):\n{completed.stderr[-2000:]}")
+    try:
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Build profile not found at {report_path} (is build_profiler in mkdocs.yml?): {exc}")
+
+    metrics = {
+        "wall_seconds": round(wall, 3),
+        "pages_per_second": round(report["pages"] / wall, 3) if wall else 0.0,
+        "hooks_seconds": round(sum(
+            item["seconds"] for item in report["hooks"] if Path(item["plugin"]).name == HOOKS_FILENAME
+        ), 6),
+        "macros_seconds": round(sum(
+            item["seconds"] for item in report.get("macros", []) if item["module"] == MACROS_MODULE
+        ), 6),
+    }
+    if report.get("peak_rss_kb") is not None:
+        metrics["peak_rss_kb"] = report["peak_rss_kb"]
+    metrics["pages"] = report["pages"]
+    return metrics
+
+
+def measure(config_path: Path, cache_dir: Path) -> Dict[str, float]:
+    """空のキャッシュから cold と warm を 1 回ずつビルドし、warm の値には warm_ を付けて返す。"""
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    cold = run_build(config_path)
+    warm = run_build(config_path)
+    return {**cold, **{f"warm_{name}": warm[name] for name in WARM_METRICS}}
+
+
+def median_metrics(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    names = sorted(set().union(*runs))
+    return {name: statistics.median(run[name] for run in runs if name in run) for name in names}
+
+
+def check(current: Dict[str, float], baseline: Dict[str, float], budgets: Dict[str, Dict[str, float]]) -> List[Tuple[str, str]]:
+    """(指標名, 判定の説明) の一覧を返す。説明が FAIL で始まるものが予算超過。"""
+    rows: List[Tuple[str, str]] = []
+    for name, budget in budgets.items():
+        if name not in current or name not in baseline:
+            rows.append((name, "skip (no value)"))
+            continue
+        base, value = baseline[name], current[name]
+        regression = base - value if name in HIGHER_IS_BETTER else value - base
+        allowed = max(base * budget.get("relative", 0.0), budget.get("absolute", 0.0))
+        change = f"{(value - base) / base * 100:+.1f}%" if base else "n/a"
+        status = "FAIL" if regression > allowed else "ok"
+        rows.append((name, f"{status:4s} {value:>12} (baseline {base}, {change}, allowed {allowed:g})"))
+    return rows
+
+
+def load_baseline(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def parse_budget_overrides(values: List[str]) -> Dict[str, float]:
+    overrides: Dict[str, float] = {}
+    for value in values:
+        name, _, relative = value.partition("=")
+        try:
+            overrides[name] = float(relative)
+        except ValueError:
+            raise SystemExit(f"Invalid --budget '{value}' (expected NAME=RELATIVE, e.g. wall_seconds=0.3)")
+    return overrides
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the site with the profiler and fail if it exceeds the budget against the baseline.")
+    parser.add_argument("-f", "--config-file", default=str(ROOT / "mkdocs.yml"), help="MkDocs config to build (default: the repository mkdocs.yml).")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Baseline JSON (default: benchmarks/baseline.json).")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of cold+warm build pairs; the median of each value is compared (default: 3).")
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=RELATIVE", help="Override the allowed relative regression of a metric.")
+    parser.add_argument("--update", action="store_true", help="Write the measured values as the new baseline and exit.")
+    args = parser.parse_args()
+
+    config_path = Path(args.config_file)
+    baseline_path = Path(args.baseline)
+    runs = []
+    with fresh_cache(config_path.resolve().parent) as cache_dir:
+        for index in range(max(1, args.repeat)):
+            runs.append(measure(config_path, cache_dir))
+            print(f"[BUILD {index + 1}] {json.dumps(runs[-1])}", file=sys.stderr)
+    current = median_metrics(runs)
+
+    baseline = load_baseline(baseline_path)
+    budgets = {**DEFAULT_BUDGETS, **((baseline or {}).get("budgets") or {})}
+    if args.update:
+        baseline_path.write_text(json.dumps({
+            "version": BASELINE_VERSION,
+            "updated": time.strftime("%Y-%m-%d"),
+            "config": os.path.relpath(config_path.resolve(), ROOT),
+            "metrics": current,
+            "budgets": budgets,
+        }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"[UPDATED] {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"[ERROR] Baseline not found: {baseline_path} (create it with --update)", file=sys.stderr)
+        return 2
+
+    for name, relative in parse_budget_overrides(args.budget).items():
+        budgets[name] = {**budgets.get(name, {}), "relative": relative}
+    if current.get("pages") != baseline["metrics"].get("pages"):
+        print(f"[NOTE] page count changed: {baseline['metrics'].get('pages')} -> {current.get('pages')}")
+    rows = check(current, baseline["metrics"], budgets)
+    for name, line in rows:
+        print(f"{name:22s} {line}")
+    failed = [name for name, line in rows if line.startswith("FAIL")]
+    if failed:
+        print(f"[BUDGET] exceeded: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    print("[BUDGET] ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
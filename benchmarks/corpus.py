@@ -0,0 +1,108 @@
+"""本番の docs と同じ形の合成コーパスを作る。
+
+- `<年>-<カテゴリ>` フォルダに `title: <カテゴリ>｜<年>年` の .pages を置く
+- 各フォルダに週 1 本の `YYYY-MM-DD.md` (front matter の date と見出し・本文) と .memo を置く
+- ルートには本番と同じく home_sections を呼ぶ index.md を置く
+
+同じ (ページ数, seed) なら同じ内容になるので、作成済みのコーパスは再利用する。
+"""
+from __future__ import annotations
+
+import json
+import random
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+CORPUS_VERSION = 1
+WEEKS_PER_YEAR = 52
+MARKER_FILENAME = "corpus.json"
+
+CATEGORIES: List[Tuple[str, str]] = [
+    ("cloud-service", "Cloudサービス"),
+    ("cs_and_net", "C#と.NET"),
+    ("ms-and-win", "MicrosoftとWindows"),
+    ("react-and-js", "ReactとJS"),
+    ("web-tech", "Web技術"),
+    ("web-trendy-tech", "Webトレンド技術"),
+    ("apple-and-mac", "AppleとMac"),
+    ("ai-and-ml", "AIと機械学習"),
+]
+TOPICS = ["Firebase", "Vercel", "Cloudflare", "Supabase", "React", "TypeScript", "Windows 11", ".NET 10", "Next.js", "Gemini"]
+SENTENCES = [
+    "{topic}の新しいリリースが公開され、開発者の間で話題になっている。",
+    "Xでは{topic}を使った事例が共有され、導入の手軽さが議論された。",
+    "{topic}のセキュリティ更新が発表され、既存の利用者にも適用が推奨されている。",
+    "コミュニティでは{topic}と他のサービスの比較が続いている。",
+    "{topic}の料金体系の変更について、公式ブログで詳細が説明された。",
+]
+INDEX_MD = """---
+title: 最新ニュース
+---
+
+最新の更新記事をカテゴリ別にピックアップしています。
+
+{{ home_sections(per_category=5, max_categories=7) }}
+"""
+
+
+def layout(pages: int, start_year: int = 2000) -> List[Tuple[str, str, int, int]]:
+    """(フォルダ名, カテゴリ名, 年, 記事数) の一覧を返す。カテゴリ x 年 で 52 本ずつ埋める。"""
+    folders = []
+    remaining = pages
+    year = start_year
+    while remaining > 0:
+        for slug, label in CATEGORIES:
+            if remaining <= 0:
+                break
+            count = min(WEEKS_PER_YEAR, remaining)
+            folders.append((f"{year}-{slug}", label, year, count))
+            remaining -= count
+        year += 1
+    return folders
+
+
+def article(rng: random.Random, day: date, label: str) -> Tuple[str, str]:
+    topics = rng.sample(TOPICS, 3)
+    lines = ["---", f"date: {day.isoformat()}", "---", ""]
+    for topic in topics:
+        lines.append(f"### {topic}の新情報（{day:%Y年%m月%d日}）")
+        lines.append("")
+        body = "".join(rng.choice(SENTENCES).format(topic=topic) for _ in range(6))
+        lines.append(f"{body}[@example](https://x.com/example/status/{rng.randrange(10**18)})")
+        lines.append("")
+        lines.append(f"- {label}の関連リンク: [{topic}](https://example.com/{topic.lower().replace(' ', '-')})")
+        lines.append("")
+    memo = f"{topics[0]}と{topics[1]}の最新動向、{topics[2]}のリリースや料金改定などの話題を整理した。開発者コミュニティでの評価もまとめている。"
+    return "\n".join(lines), memo
+
+
+def generate(root: Path, pages: int, seed: int = 0) -> Path:
+    """root/docs にコーパスを作って docs のパスを返す。作成済みで条件が同じなら何もしない。"""
+    docs_dir = root / "docs"
+    marker = root / MARKER_FILENAME
+    expected: Dict = {"version": CORPUS_VERSION, "pages": pages, "seed": seed}
+    try:
+        if json.loads(marker.read_text(encoding="utf-8")) == expected and docs_dir.is_dir():
+            return docs_dir
+    except (OSError, ValueError):
+        pass
+
+    if docs_dir.exists():
+        shutil.rmtree(docs_dir)
+    docs_dir.mkdir(parents=True)
+    rng = random.Random(seed)
+    (docs_dir / "index.md").write_text(INDEX_MD, encoding="utf-8")
+    for folder, label, year, count in layout(pages):
+        folder_dir = docs_dir / folder
+        folder_dir.mkdir()
+        (folder_dir / ".pages").write_text(f"title: {label}｜{year}年\norder: desc\norder_by: filename\n", encoding="utf-8")
+        first_sunday = date(year, 1, 1) + timedelta(days=(6 - date(year, 1, 1).weekday()) % 7)
+        for week in range(count):
+            day = first_sunday + timedelta(weeks=week)
+            text, memo = article(rng, day, label)
+            (folder_dir / f"{day.isoformat()}.md").write_text(text, encoding="utf-8")
+            (folder_dir / f"{day.isoformat()}.memo").write_text(memo, encoding="utf-8")
+    marker.write_text(json.dumps(expected), encoding="utf-8")
+    return docs_dir
@@ -0,0 +1,282 @@
+"""合成コーパスでサイトの各段階を計測し、比較できる JSON に保存する。
+
+    python -m benchmarks.run --sizes 1000,10000,100000
+
+- update_root_pages.generate_navigation (スナップショット無し / 有り)
+- macros/home.py の latest_pages / home_sections
+- title_from_filename / description_from_memo / exclude_docs の 3 プラグイン
+- `mkdocs build` 全体 (別プロセス、build_profiler のレポートも取り込む)
+  コーパスの `.cache/` (render_cache 等のキャッシュ) を消した cold と、続けてそのキャッシュを使う warm の 2 回
+  テーマの描画が nav の大きさに比例するので、既定では 1000 ページより大きいコーパスは省く
+
+コーパスは `.cache/benchmarks/corpus-<ページ数>/` に作り、2 回目以降は再利用する
+(再利用するのは docs/ と mkdocs.yml だけで、ビルドのキャッシュは毎回消す)。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import yaml
+from mkdocs.config import load_config
+from mkdocs.structure.files import get_files
+from mkdocs.structure.nav import get_navigation
+from mkdocs.structure.pages import Page
+from mkdocs.utils import yaml_load
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.corpus import generate  # noqa: E402
+from update_root_pages import generate_navigation  # noqa: E402
+
+RESULTS_VERSION = 2
+BUILD_MODES = ("cold", "warm")
+BENCH_DIR = ROOT / ".cache" / "benchmarks"
+DEFAULT_SIZES = "1000,10000,100000"
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict:
+    runs: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return {
+        "runs": [round(run, 6) for run in runs],
+        "first": round(runs[0], 6),
+        "min": round(min(runs), 6),
+        "median": round(statistics.median(runs), 6),
+    }
+
+
+def write_corpus_config(corpus_dir: Path) -> Path:
+    """リポジトリの mkdocs.yml を元に、docs_dir だけをコーパスに向けた設定を書き出す。
+
+    page_meta 等のキャッシュは設定ファイルの隣の .cache に置かれるので、設定もコーパス側に置く。
+    """
+    with open(ROOT / "mkdocs.yml", encoding="utf-8") as f:
+        config = yaml_load(f)
+    config["docs_dir"] = "docs"
+    config["site_dir"] = "site"
+    config["hooks"] = [str(ROOT / hook) for hook in config.get("hooks", [])]
+    config["theme"]["custom_dir"] = str(ROOT / config["theme"]["custom_dir"])
+    # コーパスには stylesheets や画像が無いので、存在しないファイルへの参照は外す
+    config.pop("extra_css", None)
+    config["theme"].pop("favicon", None)
+    plugins = []
+    for item in config["plugins"]:
+        if isinstance(item, dict) and "build_profiler" in item:
+            item = {"build_profiler": {"enabled": True, "report_dir": ".cache/profile"}}
+        elif isinstance(item, dict) and "macros" in item:
+            item = {"macros": {**item["macros"], "include_dir": str(ROOT / item["macros"]["include_dir"])}}
+        plugins.append(item)
+    config["plugins"] = plugins
+    path = corpus_dir / "mkdocs.yml"
+    path.write_text(yaml.safe_dump(config, allow_unicode=True, sort_keys=False), encoding="utf-8")
+    return path
+
+
+class Pipeline:
+    """mkdocs build と同じ順序で、nav ができるところまでを同じプロセスで進める。"""
+
+    def __init__(self, config_path: Path):
+        self.config = load_config(str(config_path))
+        # 計測用のラッパーが各ハンドラの時間に上乗せされないよう、プロファイラは止めておく
+        profiler = self.config.plugins.get("build_profiler")
+        if profiler is not None:
+            profiler.config["enabled"] = False
+        self.config.plugins.on_startup(command="build", dirty=False)
+        self.config = self.config.plugins.on_config(self.config)
+        self.config.plugins.on_pre_build(config=self.config)
+        self.files = get_files(self.config)
+        self.files = self.config.plugins.on_files(self.files, config=self.config)
+        self.nav = get_navigation(self.files, self.config)
+        self.nav = self.config.plugins.on_nav(self.nav, config=self.config, files=self.files)
+        self.pages: List[Page] = [file.page for file in self.files.documentation_pages() if file.page is not None]
+
+    def plugin(self, name: str):
+        return self.config.plugins[name]
+
+    def run_page_markdown(self, name: str) -> None:
+        plugin = self.plugin(name)
+        for page in self.pages:
+            page.meta = {}
+            plugin.on_page_markdown("", page=page, config=self.config, files=self.files)
+
+    def close(self) -> None:
+        self.config.plugins.on_post_build(config=self.config)
+        self.config.plugins.on_shutdown()
+
+
+def bench_size(pages: int, repeat: int, max_build_pages: int, regenerate: bool, seed: int, keep_site: bool) -> Dict:
+    corpus_dir = BENCH_DIR / f"corpus-{pages}"
+    if regenerate and corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+    started = time.perf_counter()
+    docs_dir = generate(corpus_dir, pages, seed)
+    print(f"[CORPUS] {pages} pages at {corpus_dir} ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+    config_path = write_corpus_config(corpus_dir)
+    result: Dict = {"pages": pages, "benchmarks": {}}
+    benchmarks = result["benchmarks"]
+
+    benchmarks["generate_navigation.cold"] = measure(lambda: generate_navigation(docs_dir, use_cache=False), repeat)
+    generate_navigation(docs_dir)
+    benchmarks["generate_navigation.warm"] = measure(lambda: generate_navigation(docs_dir), repeat)
+
+    started = time.perf_counter()
+    pipeline = Pipeline(config_path)
+    benchmarks["pipeline.setup"] = {"runs": [round(time.perf_counter() - started, 6)]}
+    try:
+        macros = pipeline.plugin("macros").macros
+        benchmarks["macros.latest_pages"] = measure(lambda: macros["latest_pages"](5), repeat)
+        benchmarks["macros.home_sections"] = measure(lambda: macros["home_sections"](per_category=5, max_categories=7), repeat)
+        for name in ("title_from_filename", "description_from_memo"):
+            benchmarks[f"{name}.on_page_markdown"] = measure(lambda name=name: pipeline.run_page_markdown(name), repeat)
+        exclude = pipeline.plugin("exclude_docs")
+        benchmarks["exclude_docs.on_files"] = measure(
+            lambda: exclude.on_files(get_files(pipeline.config), pipeline.config), repeat
+        )
+        benchmarks["get_files"] = measure(lambda: get_files(pipeline.config), repeat)
+    finally:
+        pipeline.close()
+
+    if pages <= max_build_pages:
+        # 前回の実行や上の計測で作られたキャッシュを消し、cold と warm を分けて記録する
+        shutil.rmtree(corpus_dir / ".cache", ignore_errors=True)
+        result["build"] = {mode: full_build(corpus_dir, config_path) for mode in BUILD_MODES}
+        if not keep_site:
+            # テーマが全ページに nav 全体を描画するので、出力はページ数の 2 乗で大きくなる
+            shutil.rmtree(corpus_dir / "site", ignore_errors=True)
+    else:
+        result["build"] = {"skipped": f"more than --max-build-pages ({max_build_pages})"}
+    return result
+
+
+def full_build(corpus_dir: Path, config_path: Path) -> Dict:
+    site_dir = corpus_dir / "site"
+    report_path = corpus_dir / ".cache" / "profile" / "build_profile.json"
+    report_path.unlink(missing_ok=True)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "mkdocs", "build", "-q", "-f", str(config_path), "-d", str(site_dir)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        return {"failed": completed.returncode, "stderr": completed.stderr[-2000:]}
+    try:
+        profile = json.loads(report_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        profile = {}
+    pages = profile.get("pages", 0)
+    hooks = profile.get("hooks", [])
+    return {
+        "wall_seconds": round(wall, 6),
+        "pages_per_second": round(pages / wall, 3) if wall else None,
+        "peak_rss_kb": profile.get("peak_rss_kb"),
+        "phases": profile.get("phases", {}),
+        "plugin_seconds": plugin_seconds(hooks),
+        "top_hooks": hooks[:10],
+    }
+
+
+def plugin_seconds(hooks: List[Dict]) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for item in hooks:
+        totals[item["plugin"]] = totals.get(item["plugin"], 0.0) + item["seconds"]
+    return {name: round(seconds, 6) for name, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
+
+
+def flatten(sizes: List[Dict]) -> Dict[str, float]:
+    """サイズ毎の主要な値を `<ページ数>.<名前>` の平らな辞書にまとめる (比較・予算チェック用)。"""
+    metrics: Dict[str, float] = {}
+    for result in sizes:
+        prefix = str(result["pages"])
+        for name, bench in result["benchmarks"].items():
+            metrics[f"{prefix}.{name}"] = bench.get("median", bench["runs"][0])
+        for mode in BUILD_MODES:
+            build = result.get("build", {}).get(mode, {})
+            if "wall_seconds" not in build:
+                continue
+            name = f"{prefix}.build.{mode}"
+            metrics[f"{name}.wall_seconds"] = build["wall_seconds"]
+            metrics[f"{name}.pages_per_second"] = build["pages_per_second"]
+            if build.get("peak_rss_kb") is not None:
+                metrics[f"{name}.peak_rss_kb"] = build["peak_rss_kb"]
+            for phase, seconds in build["phases"].items():
+                metrics[f"{name}.{phase}"] = seconds
+            for plugin, seconds in build["plugin_seconds"].items():
+                metrics[f"{name}.plugin.{plugin}"] = seconds
+    return metrics
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark navigation, macros, plugins and full builds on synthetic corpora.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated page counts (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per in-process benchmark.")
+    parser.add_argument("--max-build-pages", type=int, default=1000, help="Skip full builds for larger corpora (default: 1000).")
+    parser.add_argument("--keep-site", action="store_true", help="Keep the built site directories instead of deleting them.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus generator.")
+    parser.add_argument("--regenerate", action="store_true", help="Recreate the corpora even if they are up to date.")
+    parser.add_argument("--output", default=str(BENCH_DIR / "results.json"), help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = []
+    for pages in sizes:
+        result = bench_size(pages, max(1, args.repeat), args.max_build_pages, args.regenerate, args.seed, args.keep_site)
+        results.append(result)
+        for name, bench in result["benchmarks"].items():
+            print(f"[{pages}] {name:40s} {bench.get('median', bench['runs'][0]):9.4f}s")
+        if "skipped" in result["build"]:
+            print(f"[{pages}] build: {result['build']['skipped']}")
+            continue
+        for mode, build in result["build"].items():
+            if "wall_seconds" in build:
+                print(f"[{pages}] {'build.' + mode:40s} {build['wall_seconds']:9.4f}s ({build['pages_per_second']} pages/s)")
+            else:
+                print(f"[{pages}] build.{mode}: {build}")
+
+    output = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": results,
+        "metrics": flatten(results),
+    }
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[RESULTS] {output_path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
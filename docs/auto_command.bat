@@ -2,10 +2,8 @@
 REM ob`t@ĈfBNgɈړ
 cd /d %~dp0
 
-REM fix_frontmatter_dates.bat sAI҂
-call fix_frontmatter_dates.bat
-
-python convert_full_width_digits.py
+REM front matter ̓tCƑSp̕ϊ 1  I/O pXł܂Ƃ߂Ďs
+python run_fixers.py
 
 REM 2bҋ@
 timeout /t 2 /nobreak >nul
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""docs 修正スクリプト共通のバッチ書き換えパイプライン。
+
+- 1 ファイルにつき 1 回だけ読み込み・デコードし、登録された変換 (stage) を順に適用する
+- 内容 (バイト列) が変わったときだけ、一時ファイル + os.replace で原子的に書き戻す
+- ファイル単位の処理はスレッドプールで並列に行い、stage 毎の所要時間を集計する
+- 変換が None を返した場合はファイルを削除する (cleanup_memo のような stage 用)
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Transform = Callable[[Path, str], Optional[str]]
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """同じディレクトリの一時ファイルに書いてから os.replace で置き換える。"""
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(path: Path, original: bytes, updated: bytes) -> bool:
+    if updated == original:
+        return False
+    atomic_write_bytes(path, updated)
+    return True
+
+
+@dataclass
+class Stage:
+    name: str
+    suffixes: Tuple[str, ...]
+    transform: Transform
+
+    def applies_to(self, path: Path) -> bool:
+        return path.name.endswith(self.suffixes)
+
+
+@dataclass
+class FileResult:
+    path: Path
+    status: str
+    stages: List[str] = field(default_factory=list)
+    message: str = ""
+
+
+class StageTimings:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, name: str, elapsed: float) -> None:
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def format(self) -> List[str]:
+        return [
+            f"  {name:<10} {self.seconds[name] * 1000:9.2f} ms  ({self.calls[name]} files)"
+            for name in self.seconds
+        ]
+
+
+@dataclass
+class BatchReport:
+    results: List[FileResult]
+    timings: StageTimings
+    elapsed: float
+
+    def count(self, status: str) -> int:
+        return sum(1 for result in self.results if result.status == status)
+
+
+def rewrite_file(path: Path, stages: Sequence[Stage], timings: StageTimings, dry_run: bool = False) -> FileResult:
+    active = [stage for stage in stages if stage.applies_to(path)]
+    if not active:
+        return FileResult(path, "unchanged")
+
+    started = time.perf_counter()
+    try:
+        raw = path.read_bytes()
+    except OSError as exc:
+        return FileResult(path, "error", message=str(exc))
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return FileResult(path, "skipped", message="utf-8 で読めません")
+    timings.add("read", time.perf_counter() - started)
+
+    changed_by: List[str] = []
+    current = text
+    for stage in active:
+        started = time.perf_counter()
+        result = stage.transform(path, current)
+        timings.add(stage.name, time.perf_counter() - started)
+        if result is None:
+            if not dry_run:
+                path.unlink()
+            return FileResult(path, "deleted", changed_by + [stage.name])
+        if result != current:
+            changed_by.append(stage.name)
+            current = result
+
+    updated = current.encode("utf-8")
+    if updated == raw:
+        return FileResult(path, "unchanged")
+    if not dry_run:
+        started = time.perf_counter()
+        atomic_write_bytes(path, updated)
+        timings.add("write", time.perf_counter() - started)
+    return FileResult(path, "updated", changed_by)
+
+
+def run_batch(
+    paths: Iterable[Path],
+    stages: Sequence[Stage],
+    workers: Optional[int] = None,
+    dry_run: bool = False,
+) -> BatchReport:
+    """paths をスレッドプールで書き換える。中断されても書きかけのファイルは残らない。"""
+    timings = StageTimings()
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        results = list(pool.map(lambda path: rewrite_file(Path(path), stages, timings, dry_run), paths))
+    except KeyboardInterrupt:
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return BatchReport(results, timings, time.perf_counter() - started)
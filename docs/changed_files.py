@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""docs メンテナンス用スクリプト共通の「変更があったファイルだけ処理する」モード。
+
+- `--changed-since REV`: ローカルの git で REV との差分 (未追跡ファイル含む) に絞る
+- `--incremental`: 前回実行時に保存したマニフェスト (path -> mtime, size, hash) と比べて絞る
+  マニフェストは docs の外 (`.cache/manifests/<スクリプト名>.json`) に保存する
+  変更の無いファイルの結果が必要なスクリプトは、前回の結果 (`previous_results`) も一緒に保存して読み直す
+
+どちらのモードでも削除されたファイルは結果に含まれる (存在確認は呼び出し側で行う)。
+`--catalog` を受け付けるスクリプトは、ツリーを走査する代わりに SQLite の記事カタログ
+(リポジトリ直下の article_catalog.py) を同期してから問い合わせる。
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+MANIFEST_VERSION = 1
+SKIP_DIRS = {".venv"}
+DOCS_DIR = Path(__file__).resolve().parent
+
+
+def add_change_arguments(parser: argparse.ArgumentParser, catalog: bool = False) -> None:
+    group = parser.add_mutually_exclusive_group()
+    if catalog:
+        group.add_argument(
+            "--catalog",
+            action="store_true",
+            help="Answer from the SQLite article catalog (synced first) instead of walking the tree.",
+        )
+    group.add_argument(
+        "--changed-since",
+        metavar="REV",
+        help="Only process files changed since this git revision (including untracked files).",
+    )
+    group.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process files changed since the last --incremental run (uses a stored manifest).",
+    )
+
+
+def is_incremental(args: argparse.Namespace) -> bool:
+    return bool(getattr(args, "changed_since", None) or getattr(args, "incremental", False))
+
+
+def open_catalog():
+    """docs の記事カタログを同期して返す。カタログは常に docs 全体を対象にする。"""
+    repo_root = str(DOCS_DIR.parent)
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    from article_catalog import ArticleCatalog
+
+    catalog = ArticleCatalog(DOCS_DIR)
+    stats = catalog.sync()
+    print(f"[CATALOG] {stats.format()}", file=sys.stderr)
+    return catalog
+
+
+def iter_tree(root: Path, suffixes: Sequence[str]) -> Iterable[Path]:
+    for current, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS]
+        for name in files:
+            if name.endswith(tuple(suffixes)):
+                yield Path(current) / name
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def git_changed_paths(root: Path, since: str, suffixes: Sequence[str]) -> List[Path]:
+    """`git diff REV` と未追跡ファイルから、root 以下の変更ファイルを返す。"""
+    commands = [
+        ["git", "diff", "--name-only", "--relative", since, "--", "."],
+        ["git", "ls-files", "--others", "--exclude-standard", "--", "."],
+    ]
+    changed: Dict[str, Path] = {}
+    for command in commands:
+        result = subprocess.run(command, cwd=root, capture_output=True, text=True, encoding="utf-8")
+        if result.returncode != 0:
+            raise SystemExit(f"git failed: {' '.join(command)}\n{result.stderr.strip()}")
+        for line in result.stdout.splitlines():
+            name = line.strip()
+            if name and name.endswith(tuple(suffixes)):
+                changed[name] = (root / name).resolve()
+    return sorted(changed.values())
+
+
+class Manifest:
+    """前回実行時のファイル状態 (mtime, size, hash) を保持するマニフェスト。"""
+
+    def __init__(self, name: str, root: Path):
+        self.root = root.resolve()
+        self.path = self.root.parent / ".cache" / "manifests" / f"{name}.json"
+        self.entries: Dict[str, List] = {}
+        # 前回の実行でスクリプトが報告した結果 (変更の無いファイルの分も次回に引き継ぐ)
+        self.results: List[str] = []
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") == MANIFEST_VERSION and data.get("root") == str(self.root):
+            self.entries = data.get("entries", {})
+            self.results = data.get("results", [])
+
+    def key(self, path: Path) -> str:
+        return path.resolve().relative_to(self.root).as_posix()
+
+    def changed_paths(self, suffixes: Sequence[str]) -> List[Path]:
+        """mtime / size が変わったファイルだけハッシュを取り直し、内容が変わったものを返す。"""
+        changed: List[Path] = []
+        seen = set()
+        for path in iter_tree(self.root, suffixes):
+            key = self.key(path)
+            seen.add(key)
+            entry = self.entries.get(key)
+            stat = path.stat()
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                continue
+            digest = file_hash(path)
+            if entry and entry[2] == digest:
+                self.entries[key] = [stat.st_mtime_ns, stat.st_size, digest]
+                continue
+            changed.append(path)
+        for key in list(self.entries):
+            if key not in seen and key.endswith(tuple(suffixes)):
+                changed.append(self.root / key)
+        return sorted(changed)
+
+    def record(self, paths: Iterable[Path]) -> None:
+        """処理後の状態をマニフェストに反映する (削除されたファイルは取り除く)。"""
+        for path in paths:
+            key = self.key(path)
+            if path.is_file():
+                stat = path.stat()
+                self.entries[key] = [stat.st_mtime_ns, stat.st_size, file_hash(path)]
+            else:
+                self.entries.pop(key, None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": MANIFEST_VERSION, "root": str(self.root), "entries": self.entries, "results": self.results}
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class ChangeSet:
+    """`--changed-since` / `--incremental` の指定に応じて処理対象を絞り込む。
+
+    フラグが無い場合は従来通り root 以下の全ファイルを返す。
+    """
+
+    def __init__(self, name: str, root: Path, suffixes: Sequence[str], args: Optional[argparse.Namespace] = None):
+        self.root = root.resolve()
+        self.suffixes = tuple(suffixes)
+        self.since = getattr(args, "changed_since", None) if args else None
+        self.manifest = Manifest(name, self.root) if args is not None and getattr(args, "incremental", False) else None
+        self.paths: List[Path] = []
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.since or self.manifest)
+
+    @property
+    def previous_results(self) -> List[str]:
+        """`--incremental` のとき、前回 finish(results=...) で保存した結果。"""
+        return list(self.manifest.results) if self.manifest is not None else []
+
+    def collect(self) -> List[Path]:
+        if self.since:
+            self.paths = git_changed_paths(self.root, self.since, self.suffixes)
+        elif self.manifest is not None:
+            self.paths = self.manifest.changed_paths(self.suffixes)
+        else:
+            self.paths = sorted(iter_tree(self.root, self.suffixes))
+        if self.incremental:
+            print(f"[INCREMENTAL] {len(self.paths)} changed file(s) under {self.root}", file=sys.stderr)
+        return self.paths
+
+    def finish(self, extra_paths: Iterable[Path] = (), results: Optional[Iterable[str]] = None) -> None:
+        """処理が終わったら呼ぶ。`--incremental` のときはマニフェストを更新する。"""
+        if self.manifest is None:
+            return
+        self.manifest.record([*self.paths, *extra_paths])
+        if results is not None:
+            self.manifest.results = list(results)
+        self.manifest.save()
@@ -1,14 +1,10 @@
 import sys
 
+from memo_rules import weighted_length
+
 def count_characters(text):
-    count = 0
-    for char in text:
-        # Check if the character is ASCII (0-127)
-        if ord(char) < 128:
-            count += 0.5
-        else:
-            count += 1
-    return count
+    # ASCII (0-127) counts as 0.5, everything else as 1
+    return weighted_length(text)
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
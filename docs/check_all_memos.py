@@ -1,21 +1,49 @@
+import argparse
 import os
-import subprocess
+import sys
+from pathlib import Path
+
+from changed_files import open_catalog
+from memo_rules import CHECK_MAX_LENGTH, CHECK_MIN_LENGTH
+from memo_validation import validate_memos
+
+RANGE = f"{CHECK_MIN_LENGTH:g}-{CHECK_MAX_LENGTH:g} characters"
 
 def check_all_memos(start_dir):
+    # 以前は .memo 毎に check_memo_length.py をサブプロセスで起動していたが、同じ検査を 1 プロセスで行う
+    report = validate_memos(Path(start_dir).resolve(), checks=("length",))
     failed = []
-    for root, dirs, files in os.walk(start_dir):
-        for file in files:
-            if file.endswith('.memo'):
-                memo_path = os.path.join(root, file)
-                result = subprocess.run(['python', 'check_memo_length.py', memo_path], capture_output=True, text=True)
-                if "FAIL" in result.stdout:
-                    failed.append((memo_path, result.stdout.strip()))
+    for failure in report["failures"]:
+        memo_path = os.path.join(start_dir, failure["path"])
+        message = f"FAIL: {memo_path} - Length: {failure['length']} (NOT within {RANGE})"
+        failed.append((memo_path, message))
     return failed
 
+def check_all_memos_from_catalog(start_dir):
+    # カタログに記録済みの memo の長さで判定する (.memo を読み直さない)
+    catalog = open_catalog()
+    try:
+        start = Path(start_dir).resolve()
+        failed = []
+        for row in catalog.memo_lengths_outside(CHECK_MIN_LENGTH, CHECK_MAX_LENGTH):
+            memo_path = (catalog.docs_dir / row["path"]).with_suffix(".memo")
+            if start not in memo_path.parents:
+                continue
+            memo_path = os.path.join(start_dir, os.path.relpath(memo_path, start))
+            message = f"FAIL: {memo_path} - Length: {row['memo_length']} (NOT within {RANGE})"
+            failed.append((memo_path, message))
+        return failed
+    finally:
+        catalog.close()
+
 if __name__ == "__main__":
-    failed_memos = check_all_memos('.')
+    parser = argparse.ArgumentParser(description="Check the length of every .memo file.")
+    parser.add_argument("--catalog", action="store_true", help="Use the memo lengths recorded in the SQLite article catalog.")
+    args = parser.parse_args()
+    failed_memos = check_all_memos_from_catalog('.') if args.catalog else check_all_memos('.')
     if failed_memos:
         for path, msg in failed_memos:
             print(msg)
+        sys.exit(1)
     else:
         print("All memos passed.")
@@ -1,14 +1,13 @@
 import sys
 import os
 
+from memo_rules import CHECK_MAX_LENGTH, CHECK_MIN_LENGTH, is_within_check_range, weighted_length
+
+RANGE = f"{CHECK_MIN_LENGTH:g}-{CHECK_MAX_LENGTH:g} characters"
+
 def custom_char_length(text):
-    length = 0
-    for char in text:
-        if ord(char) < 128:  # ASCII characters
-            length += 0.5
-        else:  # Non-ASCII characters (including full-width Japanese characters)
-            length += 1
-    return length
+    # ASCII characters count as 0.5, non-ASCII (including full-width Japanese) as 1
+    return weighted_length(text)
 
 def check_memo_length(file_path):
     if not os.path.exists(file_path):
@@ -24,10 +23,10 @@ def check_memo_length(file_path):
 
     calculated_length = custom_char_length(content)
 
-    if 65 <= calculated_length <= 80:
-        print(f"PASS: {file_path} - Length: {calculated_length} (within 65-80 characters)")
+    if is_within_check_range(calculated_length):
+        print(f"PASS: {file_path} - Length: {calculated_length} (within {RANGE})")
     else:
-        print(f"FAIL: {file_path} - Length: {calculated_length} (NOT within 65-80 characters)")
+        print(f"FAIL: {file_path} - Length: {calculated_length} (NOT within {RANGE})")
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -1,25 +1,31 @@
 #!/usr/bin/env python3
-"""Delete *.memo files whose weighted length (ASCII counts as 0.5) falls outside 65-80."""
+"""Delete *.memo files whose weighted length (ASCII counts as 0.5) falls outside memo_rules.CLEANUP_MIN_LENGTH-CLEANUP_MAX_LENGTH."""
 from __future__ import annotations
 
 import argparse
 import sys
 from pathlib import Path
 
+import memo_rules
+from changed_files import ChangeSet, add_change_arguments
 
-ASCII_THRESHOLD = 128
-MIN_LENGTH = 60.0
-MAX_LENGTH = 85.0
+
+MIN_LENGTH = memo_rules.CLEANUP_MIN_LENGTH
+MAX_LENGTH = memo_rules.CLEANUP_MAX_LENGTH
 
 
 def weighted_length(text: str) -> float:
     """Return weighted length ignoring newlines; ASCII characters count as 0.5."""
-    total = 0.0
-    for ch in text:
-        if ch in ("\n", "\r"):
-            continue
-        total += 0.5 if ord(ch) < ASCII_THRESHOLD else 1.0
-    return total
+    return memo_rules.weighted_length(text, skip_newlines=True)
+
+
+def is_within_range(text: str) -> bool:
+    return MIN_LENGTH <= weighted_length(text) <= MAX_LENGTH
+
+
+def cleanup_text(path: Path, text: str) -> str | None:
+    """batch_rewrite 用の stage。範囲外なら None (= 削除) を返す。"""
+    return text if is_within_range(text) else None
 
 
 def iter_memo_files(root: Path):
@@ -31,7 +37,8 @@ def iter_memo_files(root: Path):
 def main() -> int:
     parser = argparse.ArgumentParser(
         description=(
-            "Check *.memo files and delete those whose weighted length is not between 65 and 80."
+            "Check *.memo files and delete those whose weighted length is not between "
+            f"{MIN_LENGTH:g} and {MAX_LENGTH:g}."
         ),
     )
     parser.add_argument(
@@ -45,6 +52,7 @@ def main() -> int:
         action="store_true",
         help="List files that would be removed without deleting them.",
     )
+    add_change_arguments(parser)
 
     args = parser.parse_args()
     root = Path(args.root).resolve()
@@ -53,8 +61,10 @@ def main() -> int:
         parser.error(f"Directory does not exist: {root}")
 
     removal_candidates = []
+    changes = ChangeSet("cleanup_memo", root, (".memo",), args)
+    memo_paths = [path for path in changes.collect() if path.is_file()] if changes.incremental else iter_memo_files(root)
 
-    for memo_path in iter_memo_files(root):
+    for memo_path in memo_paths:
         try:
             content = memo_path.read_text(encoding="utf-8")
         except OSError as exc:
@@ -69,6 +79,8 @@ def main() -> int:
 
     if not removal_candidates:
         print("No files exceeded the allowed range.")
+        if not args.dry_run:
+            changes.finish()
         return 0
 
     for memo_path, length in removal_candidates:
@@ -80,6 +92,8 @@ def main() -> int:
             except OSError as exc:
                 print(f"Failed to delete: {memo_path} ({exc})", file=sys.stderr)
 
+    if not args.dry_run:
+        changes.finish()
     return 0
 
 
@@ -1,52 +1,66 @@
+import argparse
 import os
-import re
+from pathlib import Path
+
+from batch_rewrite import write_if_changed
+from changed_files import ChangeSet, add_change_arguments
+from memo_rules import convert_full_width_digits
 
 def convert_full_width_to_half_width(text):
     """
     全角数字（０-９）を半角数字（0-9）に変換する
     """
-    # ０-９ (U+FF10 - U+FF19) を 0-9 (U+0030 - U+0039) に変換
-    # ． (U+FF0E) を . (U+002E) に変換
-    return text.translate(str.maketrans(
-        '０１２３４５６７８９．',
-        '0123456789.'
-    ))
-
-def process_memo_files(root_dir):
-    """
-    指定されたディレクトリ配下の *.memo ファイルを検索して置換処理を行う
-    """
-    count = 0
-    modified_count = 0
+    # ０-９ (U+FF10 - U+FF19) を 0-9 (U+0030 - U+0039) に、． (U+FF0E) を . (U+002E) に変換
+    return convert_full_width_digits(text)
 
+def iter_memo_paths(root_dir):
     for root, dirs, files in os.walk(root_dir):
         # .venv などのディレクトリは除外
         if '.venv' in dirs:
             dirs.remove('.venv')
-        
+
         for file in files:
             if file.endswith('.memo'):
-                file_path = os.path.join(root, file)
-                count += 1
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    new_content = convert_full_width_to_half_width(content)
-                    
-                    if content != new_content:
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(new_content)
-                        modified_count += 1
-                        print(f"Updated: {file_path}")
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
+                yield os.path.join(root, file)
+
+def process_memo_files(root_dir, paths=None):
+    """
+    指定されたディレクトリ配下の *.memo ファイルを検索して置換処理を行う
+    paths を渡した場合は、その一覧 (--changed-since / --incremental で絞り込んだもの) だけを処理する
+    """
+    count = 0
+    modified_count = 0
+
+    for file_path in (iter_memo_paths(root_dir) if paths is None else paths):
+        file_path = str(file_path)
+        if not os.path.isfile(file_path):
+            continue
+        count += 1
+
+        try:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            content = raw.decode('utf-8')
+
+            new_content = convert_full_width_to_half_width(content)
+
+            # 一時ファイル + os.replace で置き換えるので、途中で中断しても壊れたファイルは残らない
+            if write_if_changed(Path(file_path), raw, new_content.encode('utf-8')):
+                modified_count += 1
+                print(f"Updated: {file_path}")
+        except Exception as e:
+            print(f"Error processing {file_path}: {e}")
 
     print(f"\nTotal .memo files found: {count}")
     print(f"Total files modified: {modified_count}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert full-width digits in *.memo files to half-width.")
+    add_change_arguments(parser)
+    args = parser.parse_args()
+
     docs_dir = os.path.dirname(os.path.abspath(__file__))
     print(f"Scanning directory: {docs_dir}")
-    process_memo_files(docs_dir)
+    changes = ChangeSet("convert_full_width_digits", Path(docs_dir), (".memo",), args)
+    process_memo_files(docs_dir, changes.collect() if changes.incremental else None)
+    changes.finish()
@@ -1,6 +1,9 @@
-
+import argparse
 import os
 import sys
+from pathlib import Path
+
+from changed_files import ChangeSet, add_change_arguments, open_catalog
 
 def filter_md_files(base_dir):
     """
@@ -19,11 +22,55 @@ def filter_md_files(base_dir):
                     target_md_files.append(md_path)
     return target_md_files
 
+def filter_changed_md_files(changed_paths, previous_md_files):
+    """
+    Incremental variant of filter_md_files: only the changed .md/.memo files and the
+    previously listed .md files are re-checked, so the result stays complete as long as
+    the previous list was.
+    """
+    candidates = set(previous_md_files)
+    for path in changed_paths:
+        candidates.add(os.path.splitext(str(path))[0] + ".md")
+    return sorted(
+        md_path for md_path in candidates
+        if os.path.isfile(md_path) and not os.path.exists(os.path.splitext(md_path)[0] + ".memo")
+    )
+
+def filter_md_files_from_catalog(base_dir):
+    """
+    Same result as filter_md_files, answered from the article catalog instead of walking base_dir.
+    """
+    catalog = open_catalog()
+    try:
+        base = Path(base_dir).resolve()
+        md_paths = [catalog.docs_dir / rel_path for rel_path in catalog.missing_memos()]
+        return [str(md_path) for md_path in md_paths if base in md_path.parents]
+    finally:
+        catalog.close()
+
+def read_previous_output(output_file):
+    try:
+        with open(output_file, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List .md files that do not have a .memo yet.")
+    add_change_arguments(parser, catalog=True)
+    args = parser.parse_args()
+
     base_directory = os.getcwd()
     output_file = os.path.join(base_directory, "filtered_md_files.txt")
-    files_to_process = filter_md_files(base_directory)
+    changes = ChangeSet("filter_md_files", Path(base_directory), (".md", ".memo"), args)
+    if args.catalog:
+        files_to_process = filter_md_files_from_catalog(base_directory)
+    elif changes.incremental:
+        files_to_process = filter_changed_md_files(changes.collect(), read_previous_output(output_file))
+    else:
+        files_to_process = filter_md_files(base_directory)
     with open(output_file, "w", encoding="utf-8") as f:
         for md_file in files_to_process:
             f.write(md_file + "\n")
+    changes.finish()
     print(f"Filtered MD files written to: {output_file}")
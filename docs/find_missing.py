@@ -1,6 +1,22 @@
+import argparse
 import os
+from pathlib import Path
 
-def find_missing_memos(start_dir):
+from changed_files import ChangeSet, add_change_arguments, open_catalog
+
+def find_missing_memos(start_dir, paths=None):
+    """
+    Returns .md files under start_dir without a .memo file.
+    When paths is given (--changed-since / --incremental), only those files are checked.
+    With --incremental the caller also passes the previously reported files, so memos that
+    are still missing are listed again even though nothing changed.
+    """
+    if paths is not None:
+        md_paths = sorted({os.path.splitext(str(path))[0] + '.md' for path in paths})
+        return [
+            md_path for md_path in md_paths
+            if os.path.isfile(md_path) and not os.path.exists(os.path.splitext(md_path)[0] + '.memo')
+        ]
     missing = []
     for root, dirs, files in os.walk(start_dir):
         for file in files:
@@ -11,8 +27,40 @@ def find_missing_memos(start_dir):
                     missing.append(md_path)
     return missing
 
+def find_missing_from_catalog(start_dir):
+    """Same result as find_missing_memos, answered from the article catalog."""
+    catalog = open_catalog()
+    try:
+        start = Path(start_dir).resolve()
+        missing = []
+        for rel_path in catalog.missing_memos():
+            md_path = catalog.docs_dir / rel_path
+            if start == md_path or start in md_path.parents:
+                missing.append(os.path.join(start_dir, os.path.relpath(md_path, start)))
+        return missing
+    finally:
+        catalog.close()
+
 if __name__ == "__main__":
-    missing_files = find_missing_memos('.')
+    parser = argparse.ArgumentParser(description="Print .md files that do not have a .memo.")
+    add_change_arguments(parser, catalog=True)
+    args = parser.parse_args()
+
+    if args.catalog:
+        missing_files = find_missing_from_catalog('.')
+        for f in missing_files:
+            print(f)
+        if not missing_files:
+            print("No missing memos found.")
+        raise SystemExit(0)
+
+    changes = ChangeSet("find_missing", Path('.'), ('.md', '.memo'), args)
+    if changes.incremental:
+        # filter_md_files.py と同じく、前回の結果と変更されたファイルを合わせて確認し直す
+        missing_files = find_missing_memos('.', [*changes.collect(), *changes.previous_results])
+    else:
+        missing_files = find_missing_memos('.')
+    changes.finish(results=missing_files)
     if missing_files:
         for f in missing_files:
             print(f)
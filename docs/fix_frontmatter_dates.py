@@ -3,13 +3,19 @@
 
 - ファイル名の YYYY-MM-DD 部分を抽出し、`date:` フィールドと一致させる。
 - フロントマターが無い場合は追加する（末尾に空行を含む）。
+- `--changed-since REV` / `--incremental` で変更があったファイルだけを処理できる。
+- `--catalog` で記事カタログ上で日付が食い違っているファイルだけを処理できる。
 """
 from __future__ import annotations
 
+import argparse
 import re
 import sys
 from pathlib import Path
 
+from batch_rewrite import atomic_write_bytes
+from changed_files import ChangeSet, add_change_arguments, open_catalog
+
 DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})")
 
 
@@ -92,6 +98,15 @@ def build_frontmatter(target_date: str, newline: str) -> str:
     return f"---{newline}date: {target_date}{newline}---{newline}{newline}"
 
 
+def fix_text(path: Path, text: str) -> str:
+    """ファイル名の日付に合わせた本文を返す (batch_rewrite の stage としても使う)。"""
+    target_date = extract_date_from_name(path)
+    if not target_date:
+        return text
+    updated_content, _ = ensure_frontmatter(text, detect_newline(text), target_date)
+    return updated_content
+
+
 def process_file(path: Path) -> bool:
     target_date = extract_date_from_name(path)
     if not target_date:
@@ -112,7 +127,7 @@ def process_file(path: Path) -> bool:
         return False
 
     updated_bytes = updated_content.encode("utf-8")
-    path.write_bytes(updated_bytes)
+    atomic_write_bytes(path, updated_bytes)
     print(f"[FIX]  {path}")
     return True
 
@@ -122,9 +137,24 @@ def iter_markdown_files(root: Path):
         yield path
 
 
+def catalog_mismatches(root: Path) -> list[Path]:
+    catalog = open_catalog()
+    try:
+        root = root.resolve()
+        paths = [catalog.docs_dir / row["path"] for row in catalog.date_mismatches()]
+        return [path for path in paths if root in path.parents]
+    finally:
+        catalog.close()
+
+
 def main(argv: list[str]) -> int:
-    if argv:
-        targets = [Path(arg) for arg in argv]
+    parser = argparse.ArgumentParser(description="Sync front matter dates with YYYY-MM-DD file names.")
+    parser.add_argument("targets", nargs="*", help="Markdown files or directories (default: the docs directory).")
+    add_change_arguments(parser, catalog=True)
+    args = parser.parse_args(argv)
+
+    if args.targets:
+        targets = [Path(arg) for arg in args.targets]
     else:
         targets = [Path(__file__).resolve().parent]
 
@@ -132,9 +162,15 @@ def main(argv: list[str]) -> int:
     for target in targets:
         if target.is_file():
             total += process_file(target)
-        elif target.is_dir():
-            for md_path in iter_markdown_files(target):
+        elif target.is_dir() and args.catalog:
+            for md_path in catalog_mismatches(target):
                 total += process_file(md_path)
+        elif target.is_dir():
+            changes = ChangeSet("fix_frontmatter_dates", target, (".md",), args)
+            for md_path in changes.collect():
+                if md_path.is_file():
+                    total += process_file(md_path)
+            changes.finish()
         else:
             print(f"[WARN] {target} は存在しません")
 
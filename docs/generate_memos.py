@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""memo が無い .md に対して外部の生成コマンドを並列に実行し、.memo を作るスクリプト。
+
+- 処理対象は filter_md_files.py と同じ基準 (.memo が無い .md) でツリーから直接求める
+- 生成コマンドは `--command` (または環境変数 MEMO_GENERATOR_COMMAND) で指定する
+  `{md}` / `{memo}` / `{rel}` がそれぞれ .md の絶対パス / .memo の絶対パス / docs からの相対パスに置き換わる
+  `--stdout` を付けると、コマンドの標準出力をそのまま .memo として保存する
+- 同時実行数を `--jobs` で制限し、失敗時は指数バックオフで `--retries` 回まで再試行する
+- 生成された .memo は memo_rules の文字数ルールでその場で検証し、不合格なら削除して再試行する
+- 結果は `.cache/memo_journal.jsonl` に 1 件ずつ追記し、中断後に再実行すると続きから処理する
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from batch_rewrite import atomic_write_bytes
+from changed_files import open_catalog
+from filter_md_files import filter_md_files
+from memo_rules import convert_full_width_digits, is_within_check_range, weighted_length
+
+COMMAND_ENV = "MEMO_GENERATOR_COMMAND"
+DOCS_DIR = Path(__file__).resolve().parent
+
+
+@dataclass
+class JobResult:
+    path: str
+    status: str
+    attempts: int
+    length: Optional[float] = None
+    message: str = ""
+    seconds: float = 0.0
+
+
+class Journal:
+    """処理結果を JSON Lines で追記する。最後に記録された状態がそのファイルの状態になる。"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.states: Dict[str, Dict] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 中断時に書きかけになった行は無視する
+                    self.states[record["path"]] = record
+        except FileNotFoundError:
+            pass
+
+    def status_of(self, rel_path: str) -> Optional[str]:
+        record = self.states.get(rel_path)
+        return record["status"] if record else None
+
+    def append(self, result: JobResult) -> None:
+        record = asdict(result)
+        record["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.states[result.path] = record
+
+
+def validate_memo(text: str) -> Optional[float]:
+    """check_memo_length.py と同じ基準で、合格なら文字数を、不合格なら None を返す。"""
+    length = weighted_length(text)
+    return length if is_within_check_range(length) else None
+
+
+class MemoGenerator:
+    def __init__(self, root: Path, command: str, retries: int, backoff: float, timeout: Optional[float], use_stdout: bool, journal: Journal):
+        self.root = root
+        self.command = shlex.split(command)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.use_stdout = use_stdout
+        self.journal = journal
+
+    def build_command(self, md_path: Path, memo_path: Path) -> List[str]:
+        values = {"md": str(md_path), "memo": str(memo_path), "rel": md_path.relative_to(self.root).as_posix()}
+        return [part.format(**values) for part in self.command]
+
+    def run_once(self, md_path: Path, memo_path: Path) -> str:
+        """コマンドを 1 回実行し、検証済みの memo を残す。失敗時は理由を返す (成功時は空文字列)。"""
+        try:
+            completed = subprocess.run(
+                self.build_command(md_path, memo_path),
+                cwd=self.root,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return f"timeout after {self.timeout}s"
+        except OSError as exc:
+            return str(exc)
+        if completed.returncode != 0:
+            detail = (completed.stderr or completed.stdout).strip().splitlines()
+            return f"exit code {completed.returncode}" + (f": {detail[-1]}" if detail else "")
+
+        if self.use_stdout:
+            text = completed.stdout.strip()
+        else:
+            try:
+                text = memo_path.read_text(encoding="utf-8").strip()
+            except (OSError, UnicodeDecodeError) as exc:
+                return f"memo not written: {exc}"
+        text = convert_full_width_digits(text)
+        length = validate_memo(text)
+        if length is None:
+            memo_path.unlink(missing_ok=True)
+            return f"length {weighted_length(text)} out of range"
+        atomic_write_bytes(memo_path, text.encode("utf-8"))
+        return ""
+
+    def process(self, md_path: Path) -> JobResult:
+        rel_path = md_path.relative_to(self.root).as_posix()
+        memo_path = md_path.with_suffix(".memo")
+        started = time.perf_counter()
+        message = ""
+        for attempt in range(1, self.retries + 2):
+            message = self.run_once(md_path, memo_path)
+            if not message:
+                length = weighted_length(memo_path.read_text(encoding="utf-8"))
+                result = JobResult(rel_path, "done", attempt, length, seconds=time.perf_counter() - started)
+                break
+            if attempt <= self.retries:
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+        else:
+            result = JobResult(rel_path, "failed", self.retries + 1, message=message, seconds=time.perf_counter() - started)
+        self.journal.append(result)
+        return result
+
+
+def pending_markdown(root: Path, use_catalog: bool) -> List[Path]:
+    if use_catalog:
+        catalog = open_catalog()
+        try:
+            paths = [catalog.docs_dir / rel_path for rel_path in catalog.missing_memos()]
+        finally:
+            catalog.close()
+        return [path for path in paths if root in path.parents]
+    return sorted(Path(path) for path in filter_md_files(str(root)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate missing .memo files with an external command, in parallel.")
+    parser.add_argument("root", nargs="?", default=str(DOCS_DIR), help="Directory to process (default: the docs directory).")
+    parser.add_argument("--command", default=os.environ.get(COMMAND_ENV), help=f"Generator command with {{md}}/{{memo}}/{{rel}} placeholders (default: ${COMMAND_ENV}).")
+    parser.add_argument("--stdout", action="store_true", help="Save the command's standard output as the memo.")
+    parser.add_argument("--jobs", type=int, default=4, help="Number of commands to run at the same time.")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per file after a failed run or a rejected memo.")
+    parser.add_argument("--backoff", type=float, default=2.0, help="Initial retry delay in seconds (doubled on each retry).")
+    parser.add_argument("--timeout", type=float, default=None, help="Timeout per command run in seconds.")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many files.")
+    parser.add_argument("--retry-failed", action="store_true", help="Also process files recorded as failed in the journal.")
+    parser.add_argument("--journal", default=None, help="Journal path (default: .cache/memo_journal.jsonl next to docs).")
+    parser.add_argument("--catalog", action="store_true", help="Take the pending list from the SQLite article catalog.")
+    args = parser.parse_args(argv)
+
+    if not args.command:
+        parser.error(f"--command (or ${COMMAND_ENV}) is required")
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        parser.error(f"Directory does not exist: {root}")
+
+    journal = Journal(Path(args.journal) if args.journal else DOCS_DIR.parent / ".cache" / "memo_journal.jsonl")
+    pending = []
+    skipped = 0
+    for md_path in pending_markdown(root, args.catalog):
+        if not args.retry_failed and journal.status_of(md_path.relative_to(root).as_posix()) == "failed":
+            skipped += 1
+            continue
+        pending.append(md_path)
+    if args.limit is not None:
+        pending = pending[: args.limit]
+    print(f"[PENDING] {len(pending)} file(s), {skipped} skipped as previously failed")
+
+    generator = MemoGenerator(root, args.command, args.retries, args.backoff, args.timeout, args.stdout, journal)
+    started = time.perf_counter()
+    results: List[JobResult] = []
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for result in pool.map(generator.process, pending):
+            results.append(result)
+            if result.status == "done":
+                print(f"[DONE]   {result.path} (length {result.length}, {result.attempts} attempt(s), {result.seconds:.1f}s)")
+            else:
+                print(f"[FAILED] {result.path} ({result.message})", file=sys.stderr)
+
+    failed = sum(1 for result in results if result.status == "failed")
+    print(f"[SUMMARY] {len(results) - failed} generated, {failed} failed in {time.perf_counter() - started:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""memo の文字数と全角数字に関する共通ルール。
+
+character_counter.py / check_memo_length.py / cleanup_memo.py /
+convert_full_width_digits.py / memo_validation.py はこの定義を共有する。
+"""
+from __future__ import annotations
+
+ASCII_THRESHOLD = 128
+
+# check_memo_length.py / memo_validation.py が合格とする範囲
+CHECK_MIN_LENGTH = 65.0
+CHECK_MAX_LENGTH = 80.0
+
+# cleanup_memo.py が削除せずに残す範囲 (検査より少し緩い)
+CLEANUP_MIN_LENGTH = 60.0
+CLEANUP_MAX_LENGTH = 85.0
+
+FULL_WIDTH_DIGITS = "０１２３４５６７８９．"
+HALF_WIDTH_DIGITS = "0123456789."
+FULL_WIDTH_TRANSLATION = str.maketrans(FULL_WIDTH_DIGITS, HALF_WIDTH_DIGITS)
+
+
+def weighted_length(text: str, skip_newlines: bool = False) -> float:
+    """ASCII を 0.5、それ以外を 1 として数えた長さを返す。"""
+    total = 0.0
+    for ch in text:
+        if skip_newlines and ch in ("\n", "\r"):
+            continue
+        total += 0.5 if ord(ch) < ASCII_THRESHOLD else 1.0
+    return total
+
+
+def is_within_check_range(length: float) -> bool:
+    return CHECK_MIN_LENGTH <= length <= CHECK_MAX_LENGTH
+
+
+def find_full_width_digits(text: str) -> str:
+    """text に含まれる全角数字 (と全角ピリオド) を出現順に重複無しで返す。"""
+    found = []
+    for ch in text:
+        if ch in FULL_WIDTH_DIGITS and ch not in found:
+            found.append(ch)
+    return "".join(found)
+
+
+def convert_full_width_digits(text: str) -> str:
+    """全角数字（０-９）と全角ピリオドを半角に変換する。"""
+    return text.translate(FULL_WIDTH_TRANSLATION)
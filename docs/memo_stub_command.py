@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""generate_memos.py の動作確認用に、LLM CLI の代わりに使うスタブの生成コマンド。
+
+使い方: python generate_memos.py --command "python memo_stub_command.py {md} {memo}"
+
+.md の最初の見出しから、文字数ルールを満たす仮の memo を書き出す。
+`--fail-rate` で一定の割合だけ失敗させ、再試行の動作を確認できる。
+決まった動作が必要なとき (tests/test_generate_memos.py) は、`--fail-first N --state-dir DIR` で各ファイルの
+最初の N 回を失敗させ、`--short-match TEXT` でパスに TEXT を含むファイルに短すぎる memo を書く。
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import sys
+import time
+from pathlib import Path
+
+from memo_rules import CHECK_MIN_LENGTH, weighted_length
+
+FILLER = "仮の要約です。"
+SHORT_MEMO = "短すぎる要約。"
+
+
+def stub_memo(md_path: Path) -> str:
+    heading = ""
+    for line in md_path.read_text(encoding="utf-8").splitlines():
+        if line.startswith("#"):
+            heading = line.lstrip("#").strip()
+            break
+    text = f"{heading or md_path.stem}についての記事。"
+    while weighted_length(text) < CHECK_MIN_LENGTH:
+        text += FILLER
+    return text
+
+
+def fail_this_run(md_path: Path, state_dir: Path, fail_first: int) -> bool:
+    """ファイル毎の実行回数を state_dir に数え、最初の fail_first 回なら True。"""
+    state_dir.mkdir(parents=True, exist_ok=True)
+    counter = state_dir / f"{hashlib.sha1(str(md_path.resolve()).encode('utf-8')).hexdigest()}.runs"
+    runs = int(counter.read_text()) if counter.exists() else 0
+    counter.write_text(str(runs + 1))
+    return runs < fail_first
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stand-in memo generator for generate_memos.py.")
+    parser.add_argument("md", help="Markdown file to summarize")
+    parser.add_argument("memo", nargs="?", help="Memo file to write (prints to stdout when omitted)")
+    parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to wait, to imitate a slow generator")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Probability of exiting with an error")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail the first N runs for each file (needs --state-dir)")
+    parser.add_argument("--state-dir", default=None, help="Directory that counts the runs per file for --fail-first")
+    parser.add_argument("--short-match", default=None, help="Write a memo that is too short when the path contains this text")
+    args = parser.parse_args()
+
+    time.sleep(args.sleep)
+    if args.fail_first and fail_this_run(Path(args.md), Path(args.state_dir), args.fail_first):
+        print("stub failure (fail-first)", file=sys.stderr)
+        return 1
+    if random.random() < args.fail_rate:
+        print("stub failure", file=sys.stderr)
+        return 1
+    text = stub_memo(Path(args.md))
+    if args.short_match and args.short_match in Path(args.md).as_posix():
+        text = SHORT_MEMO
+    if args.memo:
+        Path(args.memo).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""docs 配下の .memo / .md を 1 プロセスでまとめて検査するスクリプト。
+
+- 重み付き文字数 (ASCII は 0.5) が memo_rules の CHECK_MIN_LENGTH〜CHECK_MAX_LENGTH に収まっているか (`length`)
+- .md に対応する .memo が欠けていないか (`missing`)
+- .memo に全角数字が残っていないか (`digits`)
+
+ディレクトリは os.scandir で 1 回だけ走査し、.memo の読み込みと検査はスレッドプールで並列に行う。
+結果は JSON で出力し、失敗が 1 件でもあれば終了コード 1 を返す。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from memo_rules import (
+    CHECK_MAX_LENGTH,
+    CHECK_MIN_LENGTH,
+    find_full_width_digits,
+    is_within_check_range,
+    weighted_length,
+)
+
+ALL_CHECKS = ("length", "missing", "digits")
+SKIP_DIRS = {".venv"}
+
+
+def scan_tree(root: Path) -> Tuple[List[Path], List[Path]]:
+    """root 以下の .md と .memo を os.scandir で列挙する。'.' で始まるディレクトリは飛ばす。"""
+    markdown: List[Path] = []
+    memos: List[Path] = []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError as exc:
+            print(f"Failed to scan: {current} ({exc})", file=sys.stderr)
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith(".") and entry.name not in SKIP_DIRS:
+                    stack.append(Path(entry.path))
+            elif entry.name.endswith(".md"):
+                markdown.append(Path(entry.path))
+            elif entry.name.endswith(".memo"):
+                memos.append(Path(entry.path))
+    markdown.sort()
+    memos.sort()
+    return markdown, memos
+
+
+def relative(path: Path, root: Path) -> str:
+    return path.relative_to(root).as_posix()
+
+
+def check_memo(memo_path: Path, root: Path, checks: Sequence[str]) -> List[Dict]:
+    """1 つの .memo を読み、失敗した検査の一覧を返す。"""
+    rel_path = relative(memo_path, root)
+    try:
+        content = memo_path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as exc:
+        return [{"path": rel_path, "check": "read", "error": str(exc)}]
+
+    failures: List[Dict] = []
+    if "length" in checks:
+        length = weighted_length(content)
+        if not is_within_check_range(length):
+            failures.append({
+                "path": rel_path,
+                "check": "length",
+                "length": length,
+                "min": CHECK_MIN_LENGTH,
+                "max": CHECK_MAX_LENGTH,
+            })
+    if "digits" in checks:
+        digits = find_full_width_digits(content)
+        if digits:
+            failures.append({"path": rel_path, "check": "digits", "characters": digits})
+    return failures
+
+
+def find_missing(markdown: Iterable[Path], memos: Iterable[Path], root: Path) -> List[Dict]:
+    memo_set = set(memos)
+    return [
+        {"path": relative(md_path, root), "check": "missing"}
+        for md_path in markdown
+        if md_path.with_suffix(".memo") not in memo_set
+    ]
+
+
+def validate_memos(root: Path, checks: Sequence[str] = ALL_CHECKS, workers: int | None = None) -> Dict:
+    """root 以下を検査し、JSON に変換できるレポートを返す。"""
+    started = time.perf_counter()
+    markdown, memos = scan_tree(root)
+    scanned = time.perf_counter()
+
+    failures: List[Dict] = []
+    if "missing" in checks:
+        failures.extend(find_missing(markdown, memos, root))
+    if "length" in checks or "digits" in checks:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for memo_failures in pool.map(lambda path: check_memo(path, root, checks), memos):
+                failures.extend(memo_failures)
+    finished = time.perf_counter()
+
+    counts = {check: 0 for check in checks}
+    for failure in failures:
+        counts[failure["check"]] = counts.get(failure["check"], 0) + 1
+    return {
+        "root": str(root),
+        "checks": list(checks),
+        "ok": not failures,
+        "summary": {
+            "markdown_files": len(markdown),
+            "memo_files": len(memos),
+            "failures": counts,
+            "scan_seconds": round(scanned - started, 6),
+            "total_seconds": round(finished - started, 6),
+        },
+        "failures": failures,
+    }
+
+
+def parse_checks(value: str) -> Tuple[str, ...]:
+    checks = tuple(item.strip() for item in value.split(",") if item.strip())
+    unknown = [check for check in checks if check not in ALL_CHECKS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown check(s): {', '.join(unknown)}")
+    return checks
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate *.memo files in a single process and emit a JSON report.")
+    parser.add_argument(
+        "root",
+        nargs="?",
+        default=str(Path(__file__).resolve().parent),
+        help="Directory to scan (default: the docs directory).",
+    )
+    parser.add_argument(
+        "--checks",
+        type=parse_checks,
+        default=ALL_CHECKS,
+        help=f"Comma separated checks to run (default: {','.join(ALL_CHECKS)}).",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker threads.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        parser.error(f"Directory does not exist: {root}")
+
+    report = validate_memos(root, args.checks, args.workers)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
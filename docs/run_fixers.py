@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""docs 修正スクリプトをまとめて 1 回の I/O パスで実行するスクリプト。
+
+- dates: fix_frontmatter_dates.py と同じく front matter の date をファイル名に合わせる (*.md)
+- digits: convert_full_width_digits.py と同じく全角数字を半角に変換する (*.memo)
+- cleanup: cleanup_memo.py と同じく文字数が範囲外の memo を削除する (*.memo、既定では無効)
+
+各ファイルは 1 回だけ読み込み、変換を順に適用して、内容が変わったときだけ原子的に書き戻す。
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from batch_rewrite import Stage, run_batch
+from changed_files import ChangeSet, add_change_arguments
+from cleanup_memo import cleanup_text
+from convert_full_width_digits import convert_full_width_to_half_width
+from fix_frontmatter_dates import fix_text
+
+STAGES: Dict[str, Stage] = {
+    "dates": Stage("dates", (".md",), fix_text),
+    "digits": Stage("digits", (".memo",), lambda path, text: convert_full_width_to_half_width(text)),
+    "cleanup": Stage("cleanup", (".memo",), cleanup_text),
+}
+DEFAULT_STAGES = ("dates", "digits")
+
+
+def parse_stages(value: str) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown stage(s): {', '.join(unknown)}")
+    return names
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the docs fixers over the corpus in a single pass.")
+    parser.add_argument(
+        "root",
+        nargs="?",
+        default=str(Path(__file__).resolve().parent),
+        help="Directory to process (default: the docs directory).",
+    )
+    parser.add_argument(
+        "--stages",
+        type=parse_stages,
+        default=list(DEFAULT_STAGES),
+        help=f"Comma separated stages in order (available: {', '.join(STAGES)}; default: {','.join(DEFAULT_STAGES)}).",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker threads.")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing or deleting files.")
+    add_change_arguments(parser)
+    args = parser.parse_args()
+
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        parser.error(f"Directory does not exist: {root}")
+
+    stages = [STAGES[name] for name in args.stages]
+    suffixes = tuple(sorted({suffix for stage in stages for suffix in stage.suffixes}))
+    changes = ChangeSet("run_fixers", root, suffixes, args)
+    paths = [path for path in changes.collect() if path.is_file()]
+
+    report = run_batch(paths, stages, workers=args.workers, dry_run=args.dry_run)
+    for result in report.results:
+        if result.status == "updated":
+            print(f"[FIX]    {result.path} ({', '.join(result.stages)})")
+        elif result.status == "deleted":
+            print(f"[DELETE] {result.path} ({', '.join(result.stages)})")
+        elif result.status in ("skipped", "error"):
+            print(f"[{result.status.upper()}] {result.path} ({result.message})", file=sys.stderr)
+
+    if not args.dry_run:
+        changes.finish()
+
+    label = "[DRY-RUN]" if args.dry_run else "[DONE]"
+    print(
+        f"{label} {len(report.results)} files, {report.count('updated')} updated, "
+        f"{report.count('deleted')} deleted in {report.elapsed * 1000:.1f} ms"
+    )
+    for line in report.timings.format():
+        print(line)
+    return 1 if report.count("error") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
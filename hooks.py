@@ -1,38 +1,83 @@
 from __future__ import annotations
 
-"""MkDocs hooks: ルート .pages をビルド時に自動生成/復元する。"""
+"""MkDocs hooks: ルート .pages をビルド時に自動生成し、docs_dir の外から awesome-pages に渡す。
+
+docs/.pages 自体には書き込まないので、`mkdocs serve` の監視対象を汚さず、
+同じチェックアウトで複数のビルドを同時に走らせても互いに上書きしない。
+"""
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any
+
+from mkdocs.structure.files import File, Files, InclusionLevel
 
+from article_catalog import ArticleCatalog
+from plugins.build_context import (
+    BuildContext,
+    end_all_build_contexts,
+    end_build_context,
+    get_build_context,
+    start_build_context,
+)
 from update_root_pages import generate_navigation, write_root_pages
 
-_ORIGINAL_ROOT_PAGES: Optional[str] = None
+ROOT_PAGES_URI = ".pages"
 
 
-def _root_pages_path(config: dict[str, Any]) -> Path:
-    docs_dir = Path(config["docs_dir"]).resolve()
-    return docs_dir / ".pages"
+def close_context(context: BuildContext) -> None:
+    if context.nav_overlay_dir is not None:
+        shutil.rmtree(context.nav_overlay_dir, ignore_errors=True)
+        context.nav_overlay_dir = None
+    if context.catalog is not None:
+        context.catalog.close()
+        context.catalog = None
 
 
 def on_config(config: dict[str, Any]) -> dict[str, Any]:
-    global _ORIGINAL_ROOT_PAGES
-    path = _root_pages_path(config)
-    if path.exists():
-        _ORIGINAL_ROOT_PAGES = path.read_text(encoding="utf-8")
-    else:
-        _ORIGINAL_ROOT_PAGES = None
-
-    nav = generate_navigation(path.parent)
-    write_root_pages(path.parent, nav)
+    # 前のビルドが途中で失敗して残ったコンテキストがあれば、一時ディレクトリごと片付ける
+    previous = end_build_context(config)
+    if previous is not None:
+        close_context(previous)
+    context = start_build_context(config)
+    context.set_nav(generate_navigation(context.docs_dir))
+    # extra.article_catalog: true のとき、macros が SQLite の記事カタログに問い合わせられるようにする
+    if (config.get("extra") or {}).get("article_catalog"):
+        context.catalog = ArticleCatalog(context.docs_dir)
+        context.catalog.sync()
     return config
 
 
+def on_files(files: Files, config: dict[str, Any]) -> Files:
+    context = get_build_context(config)
+    if context is None:
+        return files
+
+    # 生成した nav はプロセス専用の一時ディレクトリに置き、ルートの .pages と差し替える
+    overlay_dir = Path(tempfile.mkdtemp(prefix="mkdocs-nav-"))
+    overlay_path = write_root_pages(overlay_dir, context.nav)
+    context.nav_overlay_dir = overlay_dir
+
+    existing = files.get_file_from_path(ROOT_PAGES_URI)
+    inclusion = existing.inclusion if existing is not None else InclusionLevel.EXCLUDED
+    if existing is not None:
+        files.remove(existing)
+    files.append(File.generated(config, ROOT_PAGES_URI, abs_src_path=str(overlay_path), inclusion=inclusion))
+    return files
+
+
 def on_post_build(config: dict[str, Any]) -> None:
-    global _ORIGINAL_ROOT_PAGES
-    path = _root_pages_path(config)
-    if _ORIGINAL_ROOT_PAGES is None:
-        if path.exists():
-            path.unlink()
-    else:
-        path.write_text(_ORIGINAL_ROOT_PAGES, encoding="utf-8")
-    _ORIGINAL_ROOT_PAGES = None
+    context = end_build_context(config)
+    if context is not None:
+        close_context(context)
+
+
+def on_build_error(error: Exception) -> None:
+    # strict の警告やプラグインのエラーで on_post_build まで進まなかったビルドの nav を消す
+    for context in end_all_build_contexts():
+        close_context(context)
+
+
+def on_shutdown() -> None:
+    for context in end_all_build_contexts():
+        close_context(context)
@@ -1,100 +1,177 @@
 from __future__ import annotations
 
+import heapq
+import time
 from datetime import datetime
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 import yaml
 from mkdocs.structure.nav import Navigation, Page
 
+from plugins.build_context import category_order_from_nav, get_build_context
+from plugins.page_meta import PageMeta, date_from_filename, get_page_meta_cache
+
+
+class Entry(NamedTuple):
+    date: datetime
+    title: str
+    description: str
+    url: str
+    category_slug: str
+    category_label: str
+    has_memo: bool
+
+
+class DatedPage(NamedTuple):
+    date: datetime
+    url: str
+    category_slug: str
+    page: Page
+
+
+def select_latest(entries: Iterable[DatedPage], limit: int) -> List[DatedPage]:
+    """URL の重複を除いた上で、日付の新しい順に最大 limit 件を O(N log K) で選ぶ。"""
+    if limit <= 0:
+        return []
+    unique: Dict[str, DatedPage] = {}
+    for entry in entries:
+        unique.setdefault(entry.url, entry)
+    return heapq.nlargest(limit, unique.values(), key=attrgetter("date"))
+
+
+def select_by_category(entries: Iterable[DatedPage], per_category: int) -> Dict[str, List[DatedPage]]:
+    """カテゴリ毎に大きさ per_category のヒープで新しい記事だけを残す。
+
+    同じ日付の記事は入力順を優先する (全件ソート時の安定順序と同じ結果になる)。
+    """
+    if per_category <= 0:
+        return {}
+    heaps: Dict[str, List[Tuple[datetime, int, DatedPage]]] = {}
+    kept_urls: Dict[str, set] = {}
+    for seq, entry in enumerate(entries):
+        heap = heaps.setdefault(entry.category_slug, [])
+        urls = kept_urls.setdefault(entry.category_slug, set())
+        if entry.url in urls:
+            continue
+        item = (entry.date, -seq, entry)
+        if len(heap) < per_category:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            dropped = heapq.heapreplace(heap, item)
+            urls.discard(dropped[2].url)
+        else:
+            continue
+        urls.add(entry.url)
+    return {
+        slug: [item[2] for item in sorted(heap, key=lambda item: item[:2], reverse=True)]
+        for slug, heap in heaps.items()
+        if heap
+    }
+
+
+class EntryIndex:
+    """1 回のビルドの間だけ、日付付きページの一覧を共有するインデックス。"""
+
+    def __init__(self) -> None:
+        self.navigation: Optional[Navigation] = None
+        self.entries: Optional[List[DatedPage]] = None
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+
+    def get(self, navigation: Navigation, build: Callable[[Navigation], List[DatedPage]]) -> List[DatedPage]:
+        if self.entries is not None and self.navigation is navigation:
+            self.hits += 1
+            return self.entries
+        self.misses += 1
+        started = time.perf_counter()
+        self.entries = build(navigation)
+        self.build_seconds += time.perf_counter() - started
+        self.navigation = navigation
+        return self.entries
+
+    def invalidate(self) -> None:
+        self.navigation = None
+        self.entries = None
+
+    def reset(self) -> None:
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "build_seconds": round(self.build_seconds, 6),
+        }
+
+
+ENTRY_INDEX = EntryIndex()
+
 
 def define_env(env):
     chatter = env.start_chatting("latest-pages")
+    # define_env はビルド (serve の再ビルド含む) ごとに呼ばれるので、ここで前回の索引を捨てる
+    ENTRY_INDEX.reset()
+    meta_cache = get_page_meta_cache(env.conf)
+    # extra.strict_dates: true で、ファイル名の日付と front matter の date を突き合わせる
+    strict_dates = bool(env.variables.get("strict_dates", False))
+    entry_cache: Dict[str, Entry] = {}
 
-    def load_source(page: Page) -> Tuple[Dict, List[str]]:
-        src_path = getattr(page.file, "abs_src_path", None)
-        if not src_path:
-            return {}, []
+    def parse_date(raw_date, page: Page) -> Optional[datetime]:
+        if not raw_date:
+            return None
+        if isinstance(raw_date, datetime):
+            return raw_date
         try:
-            text = Path(src_path).read_text(encoding="utf-8")
-        except FileNotFoundError:
-            chatter(f"Source not found for {page.file.src_path}")
-            return {}, []
-        lines = text.splitlines()
-        front_meta: Dict = {}
-        body_start = 0
-        if lines and lines[0].strip() == "---":
-            front_lines: List[str] = []
-            for index, line in enumerate(lines[1:], start=1):
-                if line.strip() == "---":
-                    body_start = index + 1
-                    break
-                front_lines.append(line)
-            else:
-                body_start = len(lines)
-            if front_lines:
-                try:
-                    front_meta = yaml.safe_load("\n".join(front_lines)) or {}
-                except yaml.YAMLError as exc:
-                    chatter(f"Failed to parse front matter for {page.file.src_path}: {exc}")
-        body_lines = lines[body_start:]
-        return front_meta, body_lines
-
-    def extract_page_info(page: Page) -> Tuple[Optional[datetime], str, str, bool]:
-        page_meta = getattr(page, "meta", {}) or {}
-        front_meta, body_lines = load_source(page)
+            return datetime.fromisoformat(str(raw_date))
+        except ValueError:
+            chatter(f"Skip page {page.file.src_path}: invalid date '{raw_date}'")
+            return None
+
+    def read_page_meta(page: Page) -> PageMeta:
         src_path = getattr(page.file, "abs_src_path", None)
-        memo_summary = ""
-        if src_path:
-            memo_path = Path(src_path).with_suffix(".memo")
-            if memo_path.exists():
-                try:
-                    raw_memo = memo_path.read_text(encoding="utf-8")
-                except OSError as exc:
-                    chatter(f"Failed to read memo for {page.file.src_path}: {exc}")
-                else:
-                    memo_summary = " ".join(line.strip() for line in raw_memo.splitlines() if line.strip())
+        return meta_cache.get(src_path) if src_path else PageMeta()
+
+    def resolve_page_date(page: Page, src_uri: str) -> Optional[datetime]:
+        """ファイル名の日付を優先し、無い場合 (または strict_dates) だけ front matter を読む。"""
+        name_date = date_from_filename(src_uri)
+        if name_date and not strict_dates:
+            try:
+                return datetime.fromisoformat(name_date)
+            except ValueError:
+                pass
+        page_meta = getattr(page, "meta", {}) or {}
+        page_date = parse_date(page_meta.get("date") or read_page_meta(page).date, page)
+        if strict_dates and name_date and page_date and page_date.strftime("%Y-%m-%d") != name_date:
+            chatter(f"Date mismatch in {page.file.src_path}: front matter '{page_date:%Y-%m-%d}' vs filename '{name_date}'")
+        return page_date
+
+    def extract_page_info(page: Page) -> Tuple[str, str, bool]:
+        page_meta = getattr(page, "meta", {}) or {}
+        cached = read_page_meta(page)
+        memo_summary = cached.memo_summary
         has_memo = bool(memo_summary)
-        raw_date = page_meta.get("date") or front_meta.get("date")
-        if raw_date:
-            if isinstance(raw_date, datetime):
-                page_date = raw_date
-            else:
-                try:
-                    page_date = datetime.fromisoformat(str(raw_date))
-                except ValueError:
-                    chatter(f"Skip page {page.file.src_path}: invalid date '{raw_date}'")
-                    page_date = None
-        else:
-            page_date = None
 
-        title = page_meta.get("title") or front_meta.get("title") or ""
+        title = page_meta.get("title") or cached.title
         if not title:
             auto_title = (page.title or "").strip()
             stem = Path(page.file.src_path).stem.lower()
             if auto_title and auto_title.lower() != stem:
                 title = auto_title
         if not title:
-            for line in body_lines:
-                stripped = line.strip()
-                if stripped.startswith("#"):
-                    title = stripped.lstrip("# ")
-                    break
+            title = cached.heading
         if not title:
             title = Path(page.file.src_path).stem
 
-        description = page_meta.get("description") or front_meta.get("description") or ""
-        if not description:
-            for line in body_lines:
-                stripped = line.strip()
-                if stripped.startswith("#"):
-                    candidate = stripped.lstrip("# ").strip()
-                    if candidate:
-                        description = candidate
-                        break
+        description = page_meta.get("description") or cached.description or cached.heading
         if memo_summary:
             description = memo_summary
-        return page_date, title.strip(), description.strip(), has_memo
+        return title.strip(), description.strip(), has_memo
 
     def resolve_category_label(page: Page, slug: str) -> str:
         if page.ancestors:
@@ -115,34 +192,68 @@ def define_env(env):
             return f"{base_label} {year}年{month_label}"
         return slug
 
-    def iter_dated_pages(pages: Iterable[Page]):
-        for page in pages:
-            page_date, title, description, has_memo = extract_page_info(page)
+    def index_dates(navigation: Navigation) -> List[DatedPage]:
+        dated: List[DatedPage] = []
+        for page in navigation.pages:
+            src_uri = getattr(page.file, "src_uri", "")
+            if not src_uri:
+                continue
+            page_date = resolve_page_date(page, src_uri)
             if page_date is None:
                 continue
-            yield page_date, title, description, page, has_memo
+            dated.append(DatedPage(page_date, src_uri, src_uri.split("/", 1)[0], page))
+        return dated
 
-    def collect_entries(navigation: Navigation):
-        entries = []
-        for page_date, title, description, page, has_memo in iter_dated_pages(navigation.pages):
+    def catalog_candidates(navigation: Navigation, rows) -> Optional[List[DatedPage]]:
+        """カタログが返した記事を nav 上のページに対応付け、nav の順序で返す。
+
+        日付は index_dates と同じく resolve_page_date で決める。nav に無い記事や日付を読めない記事が
+        混じっていると、カテゴリの件数が索引と変わるので None を返す (呼び出し側は索引を使う)。
+        """
+        wanted = {row["path"] for row in rows}
+        dated: List[DatedPage] = []
+        for page in navigation.pages:
             src_uri = getattr(page.file, "src_uri", "")
-            if not src_uri:
+            if src_uri not in wanted:
                 continue
-            category_slug = src_uri.split("/", 1)[0]
-            category_label = resolve_category_label(page, category_slug)
-            entries.append({
-                "date": page_date,
-                "title": title,
-                "description": description,
-                "url": src_uri,
-                "category_slug": category_slug,
-                "category_label": category_label,
-                "has_memo": has_memo,
-            })
-        entries.sort(key=lambda item: item["date"], reverse=True)
-        return entries
+            page_date = resolve_page_date(page, src_uri)
+            if page_date is None:
+                continue
+            dated.append(DatedPage(page_date, src_uri, src_uri.split("/", 1)[0], page))
+        if len(dated) < len(wanted):
+            chatter(f"Article catalog: {len(wanted) - len(dated)} article(s) missing from the navigation or undated, using the index")
+            return None
+        return dated
+
+    def query_catalog(navigation: Navigation, query: Callable[[object], list]) -> Optional[List[DatedPage]]:
+        """extra.article_catalog が有効なら、全ページを索引する代わりにカタログから候補を取る。"""
+        context = get_build_context(env.conf)
+        if strict_dates or context is None or context.catalog is None:
+            return None
+        return catalog_candidates(navigation, query(context.catalog))
+
+    def to_entry(dated: DatedPage) -> Entry:
+        entry = entry_cache.get(dated.url)
+        if entry is None:
+            title, description, has_memo = extract_page_info(dated.page)
+            entry = Entry(
+                dated.date,
+                title,
+                description,
+                dated.url,
+                dated.category_slug,
+                resolve_category_label(dated.page, dated.category_slug),
+                has_memo,
+            )
+            entry_cache[dated.url] = entry
+        return entry
 
     def read_nav_category_order() -> Dict[str, int]:
+        context = get_build_context(env.conf)
+        if context is not None and context.nav:
+            return context.category_order
+
+        # hooks.py を使わないビルドでは docs/.pages から読む
         config = env.variables.get("config", {}) or {}
         docs_dir = Path(config.get("docs_dir", "docs"))
         pages_path = docs_dir / ".pages"
@@ -151,37 +262,18 @@ def define_env(env):
         except (OSError, yaml.YAMLError) as exc:
             chatter(f"Failed to read root .pages for category order: {exc}")
             return {}
+        return category_order_from_nav(root_pages.get("nav", []))
 
-        category_order: Dict[str, int] = {}
-        for item in root_pages.get("nav", []):
-            if isinstance(item, str):
-                continue
-            if not isinstance(item, dict):
-                continue
-            for children in item.values():
-                if not isinstance(children, list):
-                    continue
-                for child in children:
-                    if isinstance(child, str):
-                        slug = child
-                    elif isinstance(child, dict):
-                        slug = str(child.get("path", ""))
-                    else:
-                        continue
-                    if slug:
-                        category_order.setdefault(slug, len(category_order))
-        return category_order
-
-    def build_entry_line(entry: Dict) -> str:
-        date_text = entry["date"].strftime("%Y-%m-%d")
-        line = f"- [{date_text}]({entry['url']})"
-        if entry.get("has_memo") and entry["description"]:
-            desc = " ".join(entry["description"].split())
+    def build_entry_line(entry: Entry) -> str:
+        date_text = entry.date.strftime("%Y-%m-%d")
+        line = f"- [{date_text}]({entry.url})"
+        if entry.has_memo and entry.description:
+            desc = " ".join(entry.description.split())
             if len(desc) > 120:
                 desc = desc[:117].rstrip() + "..."
             line += f" - {desc}"
-        elif entry["title"]:
-            line += f" - {entry['title']}"
+        elif entry.title:
+            line += f" - {entry.title}"
         return line
 
     @env.macro
@@ -190,16 +282,10 @@ def define_env(env):
         if navigation is None:
             chatter("No navigation available yet")
             return ""
-        entries = collect_entries(navigation)
-        seen = set()
-        rows: List[str] = []
-        for entry in entries:
-            if entry["url"] in seen:
-                continue
-            seen.add(entry["url"])
-            rows.append(build_entry_line(entry))
-            if len(rows) >= limit:
-                break
+        dated = query_catalog(navigation, lambda catalog: catalog.latest(limit))
+        if dated is None or len(dated) < limit:
+            dated = ENTRY_INDEX.get(navigation, index_dates)
+        rows = [build_entry_line(to_entry(item)) for item in select_latest(dated, limit)]
         return "\n".join(rows)
 
     @env.macro
@@ -209,36 +295,35 @@ def define_env(env):
             chatter("No navigation available yet")
             return ""
         category_order = read_nav_category_order()
-        entries = collect_entries(navigation)
-        categories: Dict[str, Dict[str, object]] = {}
-        for entry in entries:
-            slug = entry["category_slug"]
-            bucket = categories.setdefault(slug, {
-                "label": entry["category_label"],
-                "slug": slug,
-                "items": [],
-                "seen": set(),
-            })
-            if entry["url"] in bucket["seen"]:
-                continue
-            if len(bucket["items"]) >= per_category:
-                continue
-            bucket["items"].append(entry)
-            bucket["seen"].add(entry["url"])
+        dated = query_catalog(navigation, lambda catalog: catalog.latest_per_category(per_category))
+        if dated is None:
+            dated = ENTRY_INDEX.get(navigation, index_dates)
+        buckets = select_by_category(dated, per_category)
         ordered_categories = sorted(
-            (data for data in categories.values() if data["items"]),
-            key=lambda data: (
-                data["items"][0]["date"],
-                -category_order.get(str(data["slug"]), len(category_order)),
+            buckets.values(),
+            key=lambda items: (
+                items[0].date,
+                -category_order.get(items[0].category_slug, len(category_order)),
             ),
             reverse=True,
         )
         if max_categories is not None:
             ordered_categories = ordered_categories[:max_categories]
         sections: List[str] = []
-        for data in ordered_categories:
-            lines = [f"### {data['label']}", ""]
-            for item in data["items"]:
-                lines.append(build_entry_line(item))
+        for items in ordered_categories:
+            entries = [to_entry(item) for item in items]
+            lines = [f"### {entries[0].category_label}", ""]
+            for entry in entries:
+                lines.append(build_entry_line(entry))
             sections.append("\n".join(lines))
         return "\n\n".join(sections)
+
+
+def on_post_build(env):
+    stats = ENTRY_INDEX.stats()
+    env.start_chatting("latest-pages")(
+        f"Entry index: {stats['hits']} hits, {stats['misses']} misses, "
+        f"built in {stats['build_seconds']:.3f}s"
+    )
+    ENTRY_INDEX.invalidate()
+    get_page_meta_cache(env.conf).save()
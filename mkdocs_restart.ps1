@@ -19,4 +19,4 @@ if ($mkdocsPid) {
 }
 
 Write-Host "Starting MkDocs server on port $Port..."
-Start-Process -NoNewWindow python -ArgumentList "-m mkdocs serve -a 127.0.0.1:$Port"
+Start-Process -NoNewWindow python -ArgumentList "-m mkdocs serve --dirty -a 127.0.0.1:$Port"
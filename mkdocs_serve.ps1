@@ -14,8 +14,8 @@ if (-not (Test-Path $venvActivate)) {
 . $venvActivate
 
 try {
-    Write-Host "mkdocs serve --dev-addr $Addr"
-    mkdocs serve --dev-addr $Addr
+    Write-Host "mkdocs serve --dirty --dev-addr $Addr"
+    mkdocs serve --dirty --dev-addr $Addr
 }
 finally {
     if (Get-Command 'deactivate' -ErrorAction SilentlyContinue) {
@@ -0,0 +1,237 @@
+/*
+ * Material for MkDocs の検索ワーカーの代わりに使う、シャード分割インデックス用のワーカー。
+ *
+ * - manifest.json (シャード毎の Bloom フィルタ) だけを最初に読み込む
+ * - クエリのトークンをすべて含み得るシャードだけを、新しい順に必要な件数が揃うまで読み込む
+ * - トークン化とハッシュは plugins/sharded_search.py と同じ規則にすること
+ */
+"use strict"
+
+var SETUP = 0, READY = 1, QUERY = 2, RESULT = 3
+var TOKEN_PATTERN = /[a-z0-9]+|[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+/g
+var FNV_OFFSET = 0x811c9dc5, FNV_OFFSET_ALT = 0x9747b28c, FNV_PRIME = 0x01000193
+var BATCH_SIZE = 2
+
+var manifest = null
+var shards = new Map()
+var encoder = new TextEncoder()
+
+function normalize(text) {
+  return text.normalize("NFKC").toLowerCase()
+}
+
+function fnv1a(bytes, seed) {
+  var value = seed
+  for (var i = 0; i < bytes.length; i++)
+    value = Math.imul(value ^ bytes[i], FNV_PRIME) >>> 0
+  return value
+}
+
+function bloomHas(bloom, token) {
+  if (!bloom.bytes) {
+    var raw = atob(bloom.bits)
+    bloom.bytes = new Uint8Array(raw.length)
+    for (var i = 0; i < raw.length; i++)
+      bloom.bytes[i] = raw.charCodeAt(i)
+  }
+  var data = encoder.encode(token)
+  var h1 = fnv1a(data, FNV_OFFSET)
+  var h2 = (fnv1a(data, FNV_OFFSET_ALT) | 1) >>> 0
+  for (var k = 0; k < bloom.k; k++) {
+    var position = ((h1 + Math.imul(k, h2)) >>> 0) % bloom.m
+    if (!(bloom.bytes[position >> 3] & (1 << (position & 7))))
+      return false
+  }
+  return true
+}
+
+/* クエリをトークンの組に分ける。各組はすべてのトークンが一致したときに一致とみなす */
+function parseQuery(query, ngram) {
+  var text = normalize(query.replace(/[+\-*~^:]/g, " "))
+  var groups = []
+  var runs = text.match(TOKEN_PATTERN) || []
+  var trailing = !/\s$/.test(text)
+  runs.forEach(function (run, index) {
+    var last = trailing && index === runs.length - 1
+    var ascii = /^[\x00-\x7f]+$/.test(run)
+    if (ascii)
+      groups.push({ label: run, exact: last ? [] : [run], prefix: last ? [run] : [], partial: [] })
+    else if (run.length < ngram)
+      groups.push({ label: run, exact: [], prefix: [], partial: [run] })
+    else if (run.length === ngram)
+      groups.push({ label: run, exact: [run], prefix: [], partial: [] })
+    else {
+      var grams = []
+      for (var i = 0; i + ngram <= run.length; i++)
+        grams.push(run.slice(i, i + ngram))
+      groups.push({ label: run, exact: grams, prefix: [], partial: [] })
+    }
+  })
+  return groups
+}
+
+function mayContain(shard, groups) {
+  return groups.every(function (group) {
+    return group.exact.every(function (token) { return bloomHas(shard.bloom, token) })
+  })
+}
+
+function loadShard(entry) {
+  if (!shards.has(entry.name))
+    shards.set(entry.name, fetch(new URL(entry.url, self.location.href))
+      .then(function (res) { return res.json() })
+      .then(function (data) {
+        data.keys = Object.keys(data.terms)
+        return data
+      }))
+  return shards.get(entry.name)
+}
+
+function addPostings(scores, postings) {
+  for (var i = 0; i < postings.length; i += 2)
+    scores.set(postings[i], (scores.get(postings[i]) || 0) + postings[i + 1])
+}
+
+/* シャード内で、すべての組に一致した文書の番号とスコアを返す */
+function matchShard(data, groups) {
+  var total = null
+  for (var g = 0; g < groups.length; g++) {
+    var group = groups[g]
+    var scores = null
+    for (var e = 0; e < group.exact.length; e++) {
+      var postings = data.terms[group.exact[e]]
+      if (!postings)
+        return new Map()
+      var current = new Map()
+      addPostings(current, postings)
+      if (scores)
+        current.forEach(function (score, doc) {
+          if (!scores.has(doc)) current.delete(doc)
+          else current.set(doc, score + scores.get(doc))
+        })
+      scores = current
+    }
+    /* 入力途中の英単語は前方一致、ngram より短い日本語は部分一致でトークンを探す */
+    if (group.prefix.length || group.partial.length) {
+      var prefixed = new Map()
+      data.keys.forEach(function (key) {
+        if (group.prefix.some(function (prefix) { return key.lastIndexOf(prefix, 0) === 0 }) ||
+            group.partial.some(function (part) { return key.indexOf(part) !== -1 }))
+          addPostings(prefixed, data.terms[key])
+      })
+      if (scores)
+        prefixed.forEach(function (score, doc) {
+          if (!scores.has(doc)) prefixed.delete(doc)
+          else prefixed.set(doc, score + scores.get(doc))
+        })
+      scores = prefixed
+    }
+    if (!scores || !scores.size)
+      return new Map()
+    if (total)
+      scores.forEach(function (score, doc) {
+        if (!total.has(doc)) scores.delete(doc)
+        else scores.set(doc, score + total.get(doc))
+      })
+    total = scores
+  }
+  return total || new Map()
+}
+
+function escapeHtml(text) {
+  return text.replace(/[&<>"]/g, function (ch) {
+    return { "&": "&amp;", "<": "&lt;", ">": "&gt;", "\"": "&quot;" }[ch]
+  })
+}
+
+function highlight(text, groups, window) {
+  var labels = groups.map(function (group) {
+    return group.label.replace(/[.*+?^${}()|[\]\\]/g, "\\$&")
+  })
+  if (!labels.length)
+    return escapeHtml(text)
+  var pattern = new RegExp(labels.join("|"), "gi")
+  if (window) {
+    var first = text.search(pattern)
+    var start = Math.max(0, first - Math.floor(window / 4))
+    text = (start > 0 ? "…" : "") + text.slice(start, start + window)
+  }
+  var out = "", last = 0, match
+  while ((match = pattern.exec(text)) !== null) {
+    if (!match[0].length) {
+      pattern.lastIndex++
+      continue
+    }
+    out += escapeHtml(text.slice(last, match.index)) + "<mark>" + escapeHtml(match[0]) + "</mark>"
+    last = match.index + match[0].length
+  }
+  return out + escapeHtml(text.slice(last))
+}
+
+function search(query) {
+  var groups = parseQuery(query, manifest.ngram)
+  if (!groups.length)
+    return Promise.resolve({ items: [] })
+  var limit = manifest.result_limit
+  var candidates = manifest.shards.filter(function (shard) { return mayContain(shard, groups) })
+  var results = []
+
+  function next(offset) {
+    if (offset >= candidates.length || results.length >= limit)
+      return Promise.resolve()
+    var batch = candidates.slice(offset, offset + BATCH_SIZE)
+    return Promise.all(batch.map(loadShard)).then(function (loaded) {
+      loaded.forEach(function (data) {
+        matchShard(data, groups).forEach(function (score, doc) {
+          results.push({ doc: data.docs[doc], score: score })
+        })
+      })
+      return next(offset + BATCH_SIZE)
+    })
+  }
+
+  return next(0).then(function () {
+    var terms = {}
+    groups.forEach(function (group) { terms[group.label] = true })
+    results.sort(function (a, b) { return b.score - a.score })
+    return {
+      items: results.map(function (result) {
+        return [{
+          location: result.doc.location,
+          title: highlight(result.doc.title, groups, 0),
+          text: highlight(result.doc.text, groups, 160),
+          score: result.score,
+          terms: terms
+        }]
+      })
+    }
+  })
+}
+
+function handler(message) {
+  switch (message.type) {
+    case SETUP:
+      return fetch(new URL("manifest.json", self.location.href))
+        .then(function (res) { return res.json() })
+        .then(function (data) {
+          manifest = data
+          return { type: READY }
+        })
+    case QUERY:
+      return search(message.data).catch(function (err) {
+        console.warn("Search failed: " + message.data, err)
+        return { items: [] }
+      }).then(function (data) {
+        return { type: RESULT, data: data }
+      })
+    default:
+      return Promise.reject(new TypeError("Invalid message type"))
+  }
+}
+
+if (typeof module !== "undefined")
+  module.exports = { normalize: normalize, parseQuery: parseQuery, bloomHas: bloomHas, handler: handler }
+else
+  addEventListener("message", function (ev) {
+    handler(ev.data).then(postMessage)
+  })
@@ -0,0 +1,74 @@
+"""1 回のビルドの間だけ hooks / macros / プラグインで共有する状態。
+
+- `hooks.on_config` が `start_build_context` で作成し、`on_post_build` で破棄する
+  (ビルドが失敗したときは `on_build_error` / `on_shutdown` で `end_all_build_contexts` から破棄する)
+- モジュールのグローバル変数ではなく docs_dir 毎に保持するので、別チェックアウトのビルドと干渉しない
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class BuildContext:
+    docs_dir: Path
+    nav: List[object] = field(default_factory=list)
+    category_order: Dict[str, int] = field(default_factory=dict)
+    nav_overlay_dir: Optional[Path] = None
+    # extra.article_catalog が有効なとき hooks が同期済みの ArticleCatalog を入れる
+    catalog: Optional[Any] = None
+
+    def set_nav(self, nav: List[object]) -> None:
+        self.nav = nav
+        self.category_order = category_order_from_nav(nav)
+
+
+def category_order_from_nav(nav: List[object]) -> Dict[str, int]:
+    """nav 構造 (`update_root_pages.build_nav_structure` の形式) からフォルダ -> 表示順を作る。"""
+    category_order: Dict[str, int] = {}
+    for item in nav:
+        if not isinstance(item, dict):
+            continue
+        for children in item.values():
+            if not isinstance(children, list):
+                continue
+            for child in children:
+                if isinstance(child, str):
+                    slug = child
+                elif isinstance(child, dict):
+                    slug = str(child.get("path", ""))
+                else:
+                    continue
+                if slug:
+                    category_order.setdefault(slug, len(category_order))
+    return category_order
+
+
+_CONTEXTS: Dict[str, BuildContext] = {}
+
+
+def _key(config) -> str:
+    return str(Path(config["docs_dir"]).resolve())
+
+
+def start_build_context(config) -> BuildContext:
+    context = BuildContext(docs_dir=Path(config["docs_dir"]).resolve())
+    _CONTEXTS[_key(config)] = context
+    return context
+
+
+def get_build_context(config) -> Optional[BuildContext]:
+    return _CONTEXTS.get(_key(config))
+
+
+def end_build_context(config) -> Optional[BuildContext]:
+    return _CONTEXTS.pop(_key(config), None)
+
+
+def end_all_build_contexts() -> List[BuildContext]:
+    """on_build_error には config が渡されないので、残っているコンテキストをまとめて取り出す。"""
+    contexts = list(_CONTEXTS.values())
+    _CONTEXTS.clear()
+    return contexts
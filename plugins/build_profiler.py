@@ -0,0 +1,306 @@
+"""ビルドのどこで時間が掛かっているかを計測するプラグイン。
+
+- 全プラグイン (hooks.py を含む) のイベントハンドラを計測用のラッパーに差し替え、
+  呼び出し毎の経過時間と確保されたメモリブロック数 (`sys.getallocatedblocks` の差分) を集計する
+- macros プラグインに登録されたマクロ (macros/home.py の latest_pages 等) も、関数毎に時間を集計する
+- ページ毎に、Markdown の変換 (page_markdown と page_content の間) と
+  テーマのテンプレート描画 (page_context と post_page の間) の時間も計る
+- ビルドの最後に JSON のレポートと、flamegraph.pl 等で読める folded stacks 形式のファイルを書き出す
+
+`enabled: !ENV [MKDOCS_PROFILE, false]` のように、CI でだけ有効にする想定。
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mkdocs.config import config_options
+from mkdocs.plugins import BasePlugin, event_priority, get_plugin_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = get_plugin_logger("build_profiler")
+
+REPORT_VERSION = 1
+FIRST = 1000
+LAST = -1000
+
+
+@dataclass
+class HookStat:
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    blocks: int = 0
+    bytes: int = 0
+
+    def add(self, elapsed: float, blocks: int, size: int) -> None:
+        self.calls += 1
+        self.seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        self.blocks += blocks
+        self.bytes += size
+
+
+@dataclass
+class PageStat:
+    markdown: float = 0.0
+    render: float = 0.0
+    hooks: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+    @property
+    def total(self) -> float:
+        return self.markdown + self.render + sum(self.hooks.values())
+
+
+def peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS はバイト、Linux は KB で返す
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def frame_name(text: str) -> str:
+    return text.replace(";", ":").replace(" ", "_")
+
+
+class Plugin(BasePlugin):
+    config_scheme = (
+        ("enabled", config_options.Type(bool, default=False)),
+        ("report_dir", config_options.Type(str, default=".cache/profile")),
+        ("top", config_options.Type(int, default=20)),
+        ("trace_memory", config_options.Type(bool, default=False)),
+    )
+
+    @event_priority(FIRST)
+    def on_config(self, config):
+        if not self.config["enabled"]:
+            return config
+        self.started = time.perf_counter()
+        self.hook_stats: Dict[Tuple[str, str], HookStat] = {}
+        self.macro_stats: Dict[Tuple[str, str], HookStat] = {}
+        self.page_stats: Dict[str, PageStat] = {}
+        self.marks: Dict[Tuple[str, str], float] = {}
+        if self.config["trace_memory"] and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.wrap_events(config["plugins"])
+        return config
+
+    def wrap_events(self, plugins) -> None:
+        """イベント毎のハンドラの一覧を、同じ順序のまま計測用のラッパーに置き換える。"""
+        owners: Dict[int, str] = {}
+        for name, plugin in plugins.items():
+            if plugin is self:
+                continue
+            for event in plugins.events:
+                method = getattr(plugin, f"on_{event}", None)
+                # CombinedEvent は 1 つのイベントに複数のハンドラを登録する
+                for handler in getattr(method, "methods", None) or ([method] if method is not None else []):
+                    owners[id(getattr(handler, "__func__", handler))] = name
+        for event, methods in plugins.events.items():
+            for index, method in enumerate(methods):
+                if getattr(method, "__self__", None) is self:
+                    continue
+                name = owners.get(id(getattr(method, "__func__", method)), getattr(method, "__module__", "?"))
+                methods[index] = self.wrap(event, name, method)
+
+    def wrap(self, event: str, name: str, method: Callable) -> Callable:
+        stat = self.hook_stats.setdefault((name, event), HookStat())
+        trace = self.config["trace_memory"]
+        label = f"{name}.{event}"
+
+        def timed(*args, **kwargs):
+            blocks = sys.getallocatedblocks()
+            size = tracemalloc.get_traced_memory()[0] if trace else 0
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                stat.add(
+                    elapsed,
+                    sys.getallocatedblocks() - blocks,
+                    tracemalloc.get_traced_memory()[0] - size if trace else 0,
+                )
+                page = kwargs.get("page")
+                if page is not None:
+                    self.page_stat(page).hooks[label] += elapsed
+
+        return timed
+
+    def on_pre_build(self, config):
+        if self.config["enabled"]:
+            self.wrap_macros(config["plugins"])
+
+    def wrap_macros(self, plugins) -> None:
+        """macros プラグインが on_config で登録したマクロを、Jinja から呼ばれる場所ごと差し替える。"""
+        macros_plugin = plugins.get("macros")
+        try:
+            macros = macros_plugin.macros
+        except AttributeError:  # macros プラグインが無い、または on_config 前
+            return
+        for name, func in list(macros.items()):
+            timed = self.wrap_macro(name, func)
+            macros[name] = timed
+            macros_plugin.variables.get("macros", {})[name] = timed
+            if macros_plugin.env.globals.get(name) is func:
+                macros_plugin.env.globals[name] = timed
+
+    def wrap_macro(self, name: str, func: Callable) -> Callable:
+        stat = self.macro_stats.setdefault((getattr(func, "__module__", None) or "?", name), HookStat())
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stat.add(time.perf_counter() - started, 0, 0)
+
+        return timed
+
+    def page_stat(self, page) -> PageStat:
+        src_uri = page.file.src_uri
+        stat = self.page_stats.get(src_uri)
+        if stat is None:
+            stat = self.page_stats[src_uri] = PageStat()
+        return stat
+
+    # ---- ページ毎の区間 (前後のイベントの間) -------------------------
+
+    @event_priority(LAST)
+    def on_page_markdown(self, markdown, page, config, files):
+        if self.config["enabled"]:
+            self.marks[(page.file.src_uri, "markdown")] = time.perf_counter()
+        return markdown
+
+    @event_priority(FIRST)
+    def on_page_content(self, html, page, config, files):
+        started = self.config["enabled"] and self.marks.pop((page.file.src_uri, "markdown"), None)
+        if started:
+            self.page_stat(page).markdown += time.perf_counter() - started
+        return html
+
+    @event_priority(LAST)
+    def on_page_context(self, context, page, config, nav):
+        if self.config["enabled"]:
+            self.marks[(page.file.src_uri, "render")] = time.perf_counter()
+        return context
+
+    @event_priority(FIRST)
+    def on_post_page(self, output, page, config):
+        started = self.config["enabled"] and self.marks.pop((page.file.src_uri, "render"), None)
+        if started:
+            self.page_stat(page).render += time.perf_counter() - started
+        return output
+
+    # ---- レポート -----------------------------------------------------
+
+    def build_report(self, total: float) -> Dict:
+        hooks = sorted(self.hook_stats.items(), key=lambda item: item[1].seconds, reverse=True)
+        pages = sorted(self.page_stats.items(), key=lambda item: item[1].total, reverse=True)
+        markdown = sum(stat.markdown for stat in self.page_stats.values())
+        render = sum(stat.render for stat in self.page_stats.values())
+        hook_seconds = sum(stat.seconds for stat in self.hook_stats.values())
+        report = {
+            "version": REPORT_VERSION,
+            "total_seconds": round(total, 6),
+            "peak_rss_kb": peak_rss_kb(),
+            "pages": len(self.page_stats),
+            "phases": {
+                "markdown_seconds": round(markdown, 6),
+                "render_seconds": round(render, 6),
+                "hook_seconds": round(hook_seconds, 6),
+                # ファイルの収集・静的ファイルのコピーなど、イベントの外で使われた時間
+                "other_seconds": round(max(0.0, total - markdown - render - hook_seconds), 6),
+            },
+            "hooks": [
+                {
+                    "plugin": name,
+                    "event": event,
+                    "calls": stat.calls,
+                    "seconds": round(stat.seconds, 6),
+                    "max_seconds": round(stat.max_seconds, 6),
+                    "allocated_blocks": stat.blocks,
+                    **({"allocated_bytes": stat.bytes} if self.config["trace_memory"] else {}),
+                }
+                for (name, event), stat in hooks
+                if stat.calls
+            ],
+            # マクロはページの page_markdown (macros) の中で呼ばれるので、上の hooks の内訳になる
+            "macros": [
+                {
+                    "module": module,
+                    "macro": name,
+                    "calls": stat.calls,
+                    "seconds": round(stat.seconds, 6),
+                    "max_seconds": round(stat.max_seconds, 6),
+                }
+                for (module, name), stat in sorted(self.macro_stats.items(), key=lambda item: item[1].seconds, reverse=True)
+                if stat.calls
+            ],
+            "slowest_pages": [
+                {
+                    "page": src_uri,
+                    "total_seconds": round(stat.total, 6),
+                    "markdown_seconds": round(stat.markdown, 6),
+                    "render_seconds": round(stat.render, 6),
+                    "hooks": {label: round(seconds, 6) for label, seconds in sorted(stat.hooks.items(), key=lambda item: item[1], reverse=True)},
+                }
+                for src_uri, stat in pages[: self.config["top"]]
+            ],
+        }
+        return report
+
+    def folded_lines(self, report: Dict) -> List[str]:
+        """`build;<page>;<区間>` / `build;<plugin>.<event>` / `build;other` をマイクロ秒で出力する。"""
+        lines: List[str] = []
+        page_hooks: Dict[str, float] = defaultdict(float)
+        for src_uri, stat in sorted(self.page_stats.items()):
+            page = f"build;page:{frame_name(src_uri)}"
+            for label, seconds in stat.hooks.items():
+                page_hooks[label] += seconds
+                lines.append(f"{page};{frame_name(label)} {int(seconds * 1e6)}")
+            lines.append(f"{page};markdown {int(stat.markdown * 1e6)}")
+            lines.append(f"{page};render {int(stat.render * 1e6)}")
+        for (name, event), stat in sorted(self.hook_stats.items()):
+            # ページのイベントは上のページ毎の行に含めたので、残り (ビルド全体のイベント) だけを出す
+            remaining = stat.seconds - page_hooks.get(f"{name}.{event}", 0.0)
+            if stat.calls and remaining > 0:
+                lines.append(f"build;{frame_name(name)}.{event} {int(remaining * 1e6)}")
+        lines.append(f"build;other {int(report['phases']['other_seconds'] * 1e6)}")
+        return [line for line in lines if not line.endswith(" 0")]
+
+    @event_priority(LAST)
+    def on_post_build(self, config):
+        if not self.config["enabled"]:
+            return
+        total = time.perf_counter() - self.started
+        report_dir = Path(self.config["report_dir"])
+        if not report_dir.is_absolute():
+            report_dir = Path(config["config_file_path"] or ".").resolve().parent / report_dir
+        report_dir.mkdir(parents=True, exist_ok=True)
+
+        report = self.build_report(total)
+        report_path = report_dir / "build_profile.json"
+        folded_path = report_dir / "build_profile.folded"
+        tmp_path = report_path.with_name(f"{report_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, report_path)
+        folded_path.write_text("\n".join(self.folded_lines(report)) + "\n", encoding="utf-8")
+        if self.config["trace_memory"]:
+            tracemalloc.stop()
+
+        log.info(f"Build profile written to {report_path} ({total:.2f}s, {report['pages']} pages)")
+        for item in report["hooks"][:5]:
+            log.info(f"  {item['seconds']:8.3f}s  {item['plugin']}.{item['event']} ({item['calls']} calls)")
@@ -1,16 +1,37 @@
-import os
 import html
+from mkdocs.config import config_options
 from mkdocs.plugins import BasePlugin
 
+from plugins.page_meta import get_page_meta_cache
+
+MEMO_SUFFIX = ".memo"
+
 class Plugin(BasePlugin):
+    config_scheme = (
+        ("preload_workers", config_options.Type(int, default=8)),
+    )
+
+    def on_files(self, files, config):
+        # .memo は description にするだけで、サイトには出力しない
+        for file in [file for file in files if file.src_uri.endswith(MEMO_SUFFIX)]:
+            files.remove(file)
+        # 全記事の memo をここでまとめて読み、ページ毎の on_page_markdown ではファイルに触れない
+        md_paths = [file.abs_src_path for file in files.documentation_pages() if file.abs_src_path]
+        get_page_meta_cache(config).preload(md_paths, self.config["preload_workers"])
+        return files
+
     def on_page_markdown(self, markdown, page, config, files):
         md_path = page.file.abs_src_path
-        memo_path = os.path.splitext(md_path)[0] + '.memo'
-        if os.path.exists(memo_path):
-            with open(memo_path, encoding='utf-8') as f:
-                desc = f.read().replace('\n', ' ')
-                desc = html.escape(desc)
-                if not page.meta:
-                    page.meta = {}
-                page.meta['description'] = desc
+        if not md_path:
+            return markdown
+        memo = get_page_meta_cache(config).get(md_path).memo
+        if memo is not None:
+            desc = memo.replace('\n', ' ')
+            desc = html.escape(desc)
+            if not page.meta:
+                page.meta = {}
+            page.meta['description'] = desc
         return markdown
+
+    def on_post_build(self, config):
+        get_page_meta_cache(config).save()
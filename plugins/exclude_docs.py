@@ -1,25 +1,69 @@
 from __future__ import annotations
 
-from fnmatch import fnmatch
-from pathlib import Path
+import os
+import re
+from fnmatch import translate
+from typing import Dict, List, Optional, Pattern
 
 from mkdocs.config import config_options
-from mkdocs.plugins import BasePlugin
+from mkdocs.plugins import BasePlugin, event_priority
 from mkdocs.structure.files import Files
 
+# fnmatch と同じく、大文字小文字を区別しない OS (Windows) では区別せずに照合する
+FLAGS = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+
+
+def compile_patterns(patterns: List[str]) -> Optional[Pattern[str]]:
+    """fnmatch 形式のパターンを 1 つの正規表現にまとめる (パターンが無ければ None)。"""
+    if not patterns:
+        return None
+    return re.compile("|".join(translate(pattern) for pattern in patterns), FLAGS)
+
+
+class Matcher:
+    """`name/` のように末尾が / のパターンはディレクトリ、それ以外はファイルに対して照合する。
+
+    どちらも docs_dir からの相対パスか、名前 (basename) のどちらかに一致すれば除外する。
+    ディレクトリの判定結果は覚えておくので、配下のファイルが多くても照合はディレクトリ毎に 1 回で済む。
+    """
+
+    def __init__(self, patterns: List[str]):
+        normalized = [str(pattern).replace("\\", "/") for pattern in patterns]
+        self.files = compile_patterns([pattern for pattern in normalized if not pattern.endswith("/")])
+        self.dirs = compile_patterns([pattern.rstrip("/") for pattern in normalized if pattern.endswith("/")])
+        self.dir_results: Dict[str, bool] = {"": False}
+
+    def dir_excluded(self, rel_dir: str) -> bool:
+        result = self.dir_results.get(rel_dir)
+        if result is None:
+            parent, _, name = rel_dir.rpartition("/")
+            result = self.dir_excluded(parent) or bool(
+                self.dirs is not None and (self.dirs.match(rel_dir) or self.dirs.match(name))
+            )
+            self.dir_results[rel_dir] = result
+        return result
+
+    def excluded(self, rel_path: str) -> bool:
+        rel_dir, _, name = rel_path.rpartition("/")
+        if self.dir_excluded(rel_dir):
+            return True
+        return self.files is not None and bool(self.files.match(rel_path) or self.files.match(name))
+
 
 class Plugin(BasePlugin):
     config_scheme = (
         ("patterns", config_options.Type(list, default=[])),
     )
 
+    def on_config(self, config):
+        self.matcher = Matcher(self.config.get("patterns", []))
+
+    # 他のプラグインの on_files が除外するファイルを見ないように、最初に実行する
+    @event_priority(100)
     def on_files(self, files: Files, config):
-        patterns = [str(pattern).replace("\\", "/") for pattern in self.config.get("patterns", [])]
-        if not patterns:
+        matcher = self.matcher
+        if matcher.files is None and matcher.dirs is None:
             return files
-        for file in list(files):
-            rel_path = file.src_path.replace("\\", "/")
-            name = Path(rel_path).name
-            if any(fnmatch(rel_path, pattern) or fnmatch(name, pattern) for pattern in patterns):
-                files.remove(file)
+        for file in [file for file in files if matcher.excluded(file.src_uri)]:
+            files.remove(file)
         return files
@@ -0,0 +1,96 @@
+"""macros の記法を含まないページで、mkdocs-macros の Jinja 処理 (テンプレートのコンパイルと描画) を省くプラグイン。
+
+- macros より前に Markdown とタイトルを走査し、macros の Jinja 環境の開始記号 (`{{` / `{%` / `{#`) が
+  無いページには `render_macros: false` を設定する (macros は何もせずに Markdown を返す)
+- front matter で `render_macros` を指定したページと、render_cache が当たったページには触れない
+- 走査は部分文字列の検索だけなので、結果はキャッシュせず毎ビルド行う
+- ビルドの最後に省いたページ数を表示する (省いた時間は build_profiler の macros の時間と比べて見る)
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple
+
+from mkdocs.config import config_options
+from mkdocs.plugins import BasePlugin, CombinedEvent, event_priority, get_plugin_logger
+from mkdocs.structure.files import Files
+from mkdocs.structure.pages import Page
+
+from plugins.render_cache import JINJA_MARKERS
+
+log = get_plugin_logger("macro_bypass")
+
+
+@dataclass
+class BypassStats:
+    bypassed: int = 0
+    rendered: int = 0
+    skipped: int = 0
+
+    def format(self) -> str:
+        total = self.bypassed + self.rendered
+        return (
+            f"{self.bypassed} of {total} page(s) skipped the Jinja pass"
+            + (f"; {self.skipped} left to render_cache/front matter" if self.skipped else "")
+        )
+
+
+class Plugin(BasePlugin):
+    config_scheme = (
+        ("enabled", config_options.Type(bool, default=True)),
+    )
+
+    def on_config(self, config):
+        self.macros = None
+        if not self.config["enabled"]:
+            return
+        self.stats = BypassStats()
+        # render_macros を設定したページ (macros の後で front matter のままに戻す)
+        self.bypassed: set = set()
+        self.macros = config["plugins"].get("macros")
+        if self.macros is None:
+            log.debug("Disabled: the macros plugin is not configured")
+
+    def markers(self) -> Tuple[str, ...]:
+        """macros の Jinja 環境の開始記号 (mkdocs.yml の j2_*_start_string で変えられる)。"""
+        env = getattr(self.macros, "env", None)
+        if env is None:
+            return JINJA_MARKERS
+        return (env.variable_start_string, env.block_start_string, env.comment_start_string)
+
+    def uses_macros(self, markdown: str, title: str) -> bool:
+        return any(marker in markdown or marker in title for marker in self.markers())
+
+    # render_cache (100) の後、macros (0) より前に判定する
+    @event_priority(50)
+    def _on_page_markdown_scan(self, markdown, page: Page, config, files: Files):
+        if self.macros is None:
+            return markdown
+        if page.meta is None:
+            page.meta = {}
+        if "render_macros" in page.meta:
+            self.stats.skipped += 1
+            return markdown
+        if self.uses_macros(markdown, str(page.title or "")):
+            self.stats.rendered += 1
+            return markdown
+        page.meta["render_macros"] = False
+        self.bypassed.add(page.file.src_uri)
+        self.stats.bypassed += 1
+        return markdown
+
+    # macros が終わったら、設定した render_macros を消して front matter のままに戻す
+    @event_priority(-100)
+    def _on_page_markdown_restore(self, markdown, page: Page, config, files: Files):
+        if self.macros is None or page.file.src_uri not in self.bypassed:
+            return markdown
+        self.bypassed.discard(page.file.src_uri)
+        page.meta.pop("render_macros", None)
+        return markdown
+
+    on_page_markdown = CombinedEvent(_on_page_markdown_scan, _on_page_markdown_restore)
+
+    def on_post_build(self, config):
+        if self.macros is None:
+            return
+        log.info(f"Macro bypass: {self.stats.format()}")
@@ -0,0 +1,260 @@
+"""記事ページのメタデータをビルドを跨いでキャッシュするモジュール。
+
+- 各記事の front matter (date / title / description)、最初の見出し、`.memo` の内容を保持する
+- `.md` と `.memo` それぞれの (mtime, size) が変わったファイルだけを読み直す
+- `preload()` でビルドの最初に全記事をまとめて確認しておくと、ページ毎の処理ではファイルに触れない
+- キャッシュは `docs_dir` の外 (`mkdocs.yml` と同じ階層の `.cache/`) に JSON で保存する
+- macros と各プラグインは `get_page_meta_cache(config)` で同じインスタンスを共有する
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import yaml
+
+log = logging.getLogger(f"mkdocs.plugins.{__name__}")
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = ".cache"
+CACHE_FILENAME = "page_meta.json"
+
+# docs/fix_frontmatter_dates.py がファイル名と front matter の date を同期させる際と同じ規則
+DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+Signature = Optional[List[int]]
+
+
+@dataclass
+class PageMeta:
+    date: Optional[str] = None
+    title: str = ""
+    description: str = ""
+    heading: str = ""
+    memo: Optional[str] = None
+
+    @property
+    def memo_summary(self) -> str:
+        if not self.memo:
+            return ""
+        return " ".join(line.strip() for line in self.memo.splitlines() if line.strip())
+
+    @property
+    def has_memo(self) -> bool:
+        return bool(self.memo_summary)
+
+
+def file_signature(path: str) -> Signature:
+    """ファイルの (mtime_ns, size) を返す。存在しなければ None。"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def date_from_filename(path: str) -> Optional[str]:
+    """ファイル名 (`YYYY-MM-DD.md`) から日付文字列を取り出す。YAML は読まない。"""
+    match = DATE_PATTERN.search(path.replace("\\", "/").rsplit("/", 1)[-1])
+    return match.group(1) if match else None
+
+
+def memo_path_for(src_path: str) -> str:
+    return os.path.splitext(src_path)[0] + ".memo"
+
+
+def first_heading(lines: Iterable[str]) -> str:
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            candidate = stripped.lstrip("# ").strip()
+            if candidate:
+                return candidate
+    return ""
+
+
+def parse_front_matter(front_lines: List[str], src_path: str) -> Dict[str, Any]:
+    if not front_lines:
+        return {}
+    try:
+        front_meta = yaml.safe_load("".join(front_lines)) or {}
+    except yaml.YAMLError as exc:
+        log.info(f"Failed to parse front matter for {src_path}: {exc}")
+        return {}
+    return front_meta if isinstance(front_meta, dict) else {}
+
+
+def read_page_head(src_path: str) -> Tuple[Dict[str, Any], str]:
+    """front matter と最初の見出しだけを行単位で読み、見つかった時点で読み込みを止める。
+
+    週次記事は本文が長いので、ファイル全体を読んで splitlines するより読み込み量が少ない。
+    """
+    with open(src_path, encoding="utf-8") as handle:
+        first_line = handle.readline()
+        if first_line.strip() != "---":
+            return {}, first_heading(chain([first_line], handle))
+        front_lines: List[str] = []
+        for line in handle:
+            if line.strip() == "---":
+                break
+            front_lines.append(line)
+        front_meta = parse_front_matter(front_lines, src_path)
+        return front_meta, first_heading(handle)
+
+
+def parse_page(src_path: str) -> PageMeta:
+    front_meta, heading = read_page_head(src_path)
+    raw_date = front_meta.get("date")
+    return PageMeta(
+        date=str(raw_date) if raw_date else None,
+        title=str(front_meta.get("title") or ""),
+        description=str(front_meta.get("description") or ""),
+        heading=heading,
+    )
+
+
+def read_memo(memo_path: str) -> Optional[str]:
+    try:
+        return Path(memo_path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    except OSError as exc:
+        log.info(f"Failed to read memo {memo_path}: {exc}")
+        return None
+
+
+class PageMetaCache:
+    """`.md` / `.memo` の署名で無効化される永続メタデータキャッシュ。"""
+
+    def __init__(self, path: Path, docs_dir: Path):
+        self.path = path
+        self.docs_dir = docs_dir
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.touched: set = set()
+        # preload() で読み込んだ、今回のビルド中だけ有効なエントリ (save() で捨てる)
+        self.preloaded: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            log.info(f"Ignoring unreadable page metadata cache {self.path}: {exc}")
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self.entries = data.get("entries", {})
+
+    def key_for(self, src_path: str) -> str:
+        try:
+            return Path(os.path.relpath(src_path, self.docs_dir)).as_posix()
+        except ValueError:
+            return Path(src_path).as_posix()
+
+    def resolve(self, src_path: str) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+        """(キー, エントリ, 読み直したか) を返す。エントリが None ならソースが無い。
+
+        self.entries は読むだけなので、preload のスレッドからも呼べる。
+        """
+        key = self.key_for(src_path)
+        md_sig = file_signature(src_path)
+        if md_sig is None:
+            return key, None, False
+        memo_path = memo_path_for(src_path)
+        memo_sig = file_signature(memo_path)
+
+        entry = self.entries.get(key)
+        if entry and entry.get("md") == md_sig and entry.get("memo") == memo_sig:
+            return key, entry, False
+
+        if entry and entry.get("md") == md_sig:
+            meta = PageMeta(**entry["meta"])
+        else:
+            meta = parse_page(src_path)
+        meta.memo = read_memo(memo_path) if memo_sig is not None else None
+        return key, {"md": md_sig, "memo": memo_sig, "meta": asdict(meta)}, True
+
+    def apply(self, key: str, entry: Optional[Dict[str, Any]], changed: bool) -> PageMeta:
+        self.touched.add(key)
+        if entry is None:
+            log.info(f"Source not found for {key}")
+            return PageMeta()
+        if changed:
+            self.misses += 1
+            self.entries[key] = entry
+            self.dirty = True
+        else:
+            self.hits += 1
+        return PageMeta(**entry["meta"])
+
+    def get(self, src_path: str) -> PageMeta:
+        """記事のメタデータを返す。preload 済みならファイルには触れず、それ以外は変更があったファイルだけを読み直す。"""
+        key = self.key_for(src_path)
+        entry = self.preloaded.get(key)
+        if entry is not None:
+            return PageMeta(**entry["meta"])
+        return self.apply(*self.resolve(src_path))
+
+    def preload(self, src_paths: Iterable[str], workers: int = 8) -> int:
+        """記事をまとめてスレッドプールで stat / 読み込みし、このビルドの間は get() をメモリだけで返す。"""
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(self.resolve, src_paths))
+        for key, entry, changed in results:
+            self.apply(key, entry, changed)
+            if entry is not None:
+                self.preloaded[key] = entry
+        return len(results)
+
+    def save(self) -> None:
+        """変更があればキャッシュを書き出す。消えた記事のエントリは削除する。"""
+        stale = [
+            key for key in self.entries
+            if key not in self.touched and not (self.docs_dir / key).is_file()
+        ]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self.dirty = True
+        log.debug(f"Page metadata cache: {self.hits} hits, {self.misses} misses")
+        self.touched = set()
+        self.preloaded = {}
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        payload = {"version": CACHE_VERSION, "entries": self.entries}
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+_CACHES: Dict[str, PageMetaCache] = {}
+
+
+def cache_dir_for(config) -> Path:
+    """`mkdocs.yml` と同じ階層の `.cache/` を返す (docs_dir の外)。"""
+    config_file = config.get("config_file_path")
+    if config_file:
+        return Path(config_file).resolve().parent / CACHE_DIRNAME
+    return Path(config["docs_dir"]).resolve().parent / CACHE_DIRNAME
+
+
+def get_page_meta_cache(config) -> PageMetaCache:
+    path = cache_dir_for(config) / CACHE_FILENAME
+    cache = _CACHES.get(str(path))
+    if cache is None:
+        cache = PageMetaCache(path, Path(config["docs_dir"]).resolve())
+        _CACHES[str(path)] = cache
+    return cache
@@ -0,0 +1,207 @@
+"""記事ページの Markdown 変換を、ページのループより前にプロセスプールでまとめて行うプラグイン。
+
+- nav ができた後 (on_nav) に各記事を読み込み、mkdocs.yml と同じ Markdown 拡張で並列に HTML へ変換する
+- ページのループでは、page_markdown の後の Markdown が変換したときと同じなら `page.render` を省き、結果を戻す
+- Jinja の記法を含むページ (index.md) と、render_cache に結果があるページ、dirty ビルドで描画しないページは対象にしない
+- on_nav で読んだソースは、ページのループで読み直さずにそのまま使う (読んだときの (mtime, size) が
+  変わっていれば読み直し、変換結果も使わない)
+- ワーカーで出たリンク切れ等の警告は、そのページの変換結果を戻すときに本体のロガーで出し直す
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from mkdocs.config import config_options
+from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.plugins import BasePlugin, event_priority, get_plugin_logger
+from mkdocs.structure.files import File, Files
+from mkdocs.structure.nav import Navigation
+from mkdocs.structure.pages import Page
+
+from plugins.page_meta import Signature, file_signature
+from plugins.render_cache import (
+    JINJA_MARKERS,
+    PAGES_LOGGER,
+    RecordCollector,
+    missing_render_attributes,
+    render_result,
+    replay_records,
+    restore_render,
+)
+
+log = get_plugin_logger("parallel_markdown")
+
+# mkdocs.yml の validation に書く値 (検証後の設定ではログレベルの数値になっている)
+VALIDATION_LEVELS = {logging.WARNING: "warn", logging.INFO: "info", logging.DEBUG: "ignore"}
+
+# ---- ワーカープロセス側 ---------------------------------------------------
+
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(settings: Dict[str, Any], src_uris: List[str]) -> None:
+    config = MkDocsConfig(config_file_path=settings["config_file_path"])
+    config.load_dict(settings["config"])
+    errors, _ = config.validate()
+    if errors:
+        raise RuntimeError(f"Invalid worker config: {errors}")
+    files = Files([File(src_uri, config["docs_dir"], config["site_dir"], config["use_directory_urls"]) for src_uri in src_uris])
+    collector = RecordCollector()
+    logger = logging.getLogger(PAGES_LOGGER)
+    # fork したワーカーは本体のハンドラを引き継ぐので、ここでは出さずに集めて本体に返す
+    logger.handlers = [collector]
+    logger.propagate = False
+    logger.setLevel(settings["log_level"])
+    _WORKER.update(config=config, files=files, collector=collector)
+
+
+def _convert(task: Tuple[str, str]) -> Tuple[str, Optional[Dict[str, Any]], List[Tuple[int, str]], str]:
+    src_uri, markdown = task
+    collector: RecordCollector = _WORKER["collector"]
+    collector.records = []
+    try:
+        file = _WORKER["files"].get_file_from_path(src_uri)
+        page = Page(None, file, _WORKER["config"])
+        page.markdown = markdown
+        page.render(_WORKER["config"], _WORKER["files"])
+        return src_uri, render_result(page, page.content), collector.records, ""
+    except Exception as exc:  # 変換できなかったページは本体で通常通り変換する
+        return src_uri, None, [], f"{type(exc).__name__}: {exc}"
+
+
+# ---- プラグイン本体 -------------------------------------------------------
+
+def worker_settings(config) -> Optional[Dict[str, Any]]:
+    """ワーカーで MkDocsConfig を組み立て直すための設定。拡張がオブジェクトで渡されていれば None。"""
+    extensions = []
+    for extension in config["markdown_extensions"]:
+        if not isinstance(extension, str):
+            return None
+        options = (config["mdx_configs"] or {}).get(extension)
+        extensions.append({extension: options} if options else extension)
+    validation = {
+        group: {name: VALIDATION_LEVELS.get(level, "warn") for name, level in dict(options).items()}
+        for group, options in dict(config["validation"]).items()
+    }
+    return {
+        "config_file_path": config["config_file_path"],
+        "log_level": logging.getLogger(PAGES_LOGGER).getEffectiveLevel(),
+        "config": {
+            "site_name": config["site_name"],
+            "site_url": config["site_url"],
+            "docs_dir": config["docs_dir"],
+            "site_dir": config["site_dir"],
+            "use_directory_urls": config["use_directory_urls"],
+            "markdown_extensions": extensions,
+            "validation": validation,
+        },
+    }
+
+
+class Plugin(BasePlugin):
+    config_scheme = (
+        ("enabled", config_options.Type(bool, default=True)),
+        ("workers", config_options.Type(int, default=0)),
+        ("min_pages", config_options.Type(int, default=32)),
+    )
+
+    def on_config(self, config):
+        self.results: Dict[str, Tuple[str, Dict[str, Any], List[Tuple[int, str]]]] = {}
+        self.used = 0
+        # 変換結果の受け渡しに render_cache と同じ Page の内部属性を使う
+        if self.config["enabled"]:
+            missing = missing_render_attributes(config)
+            if missing:
+                log.warning(f"Disabled: this MkDocs version has no Page.{', Page.'.join(missing)}")
+                self.config["enabled"] = False
+
+    # 他のプラグインの on_nav (partitioned_build 等) がすべて終わってから、ページのループの直前に変換する
+    @event_priority(-200)
+    def on_nav(self, nav: Navigation, config, files: Files):
+        if not self.config["enabled"]:
+            return nav
+        workers = self.config["workers"] or os.cpu_count() or 1
+        settings = worker_settings(config)
+        if settings is None:
+            log.info("Skipped: markdown_extensions contains extension objects that cannot be sent to workers")
+            return nav
+
+        started = time.perf_counter()
+        render_cache = config["plugins"].get("render_cache")
+        tasks: List[Tuple[str, str]] = []
+        for file in files.documentation_pages():
+            page = file.page
+            # dirty ビルドで描画しないページ (serve_dependencies が決める) は読まない
+            if page is None or not file.is_modified():
+                continue
+            page.read_source(config)
+            # MkDocs がページのループで呼ぶ read_source を、ここで読んだ結果を戻す処理に置き換える
+            page.read_source = partial(
+                self.reuse_source, page, file_signature(file.abs_src_path), page.markdown, copy.deepcopy(page.meta)
+            )
+            markdown = page.markdown or ""
+            if any(marker in markdown for marker in JINJA_MARKERS):
+                continue
+            if render_cache is not None and render_cache.would_hit(markdown, page, files):
+                continue
+            tasks.append((file.src_uri, markdown))
+        if workers < 2 or len(tasks) < self.config["min_pages"]:
+            log.debug(f"Skipped: {len(tasks)} page(s) to convert, {workers} worker(s)")
+            return nav
+
+        src_uris = [file.src_uri for file in files]
+        failed = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings, src_uris)) as pool:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            sources = dict(tasks)
+            for src_uri, result, records, error in pool.map(_convert, tasks, chunksize=chunksize):
+                if result is None:
+                    failed += 1
+                    log.debug(f"Falling back to serial conversion for {src_uri}: {error}")
+                    continue
+                self.results[src_uri] = (sources[src_uri], result, records)
+        log.info(
+            f"Converted {len(self.results)} page(s) with {workers} worker(s) in {time.perf_counter() - started:.2f}s"
+            + (f", {failed} left to the serial loop" if failed else "")
+        )
+        return nav
+
+    def reuse_source(self, page: Page, signature: Signature, markdown: str, meta: Dict[str, Any], config) -> None:
+        del page.read_source
+        if file_signature(page.file.abs_src_path) != signature:
+            # on_nav の後で編集されたページは読み直し、読む前の内容で変換した結果は捨てる
+            self.results.pop(page.file.src_uri, None)
+            page.read_source(config)
+            return
+        page.markdown, page.meta = markdown, meta
+
+    # render_cache と同じく、他のプラグインがすべて終わった後の Markdown が変換時と同じときだけ結果を使う
+    @event_priority(-100)
+    def on_page_markdown(self, markdown, page: Page, config, files: Files):
+        if not self.config["enabled"]:
+            return markdown
+        converted = self.results.pop(page.file.src_uri, None)
+        # render_cache が当たって page.render を差し替え済みなら、そちらを使う
+        if converted is None or "render" in page.__dict__:
+            return markdown
+        source, result, records = converted
+        if markdown.rstrip("\n") != source.rstrip("\n"):
+            return markdown
+        page.render = partial(self.restore, page, result, records)
+        return markdown
+
+    def restore(self, page: Page, result: Dict[str, Any], records: List[Tuple[int, str]], config, files: Files) -> None:
+        replay_records(records)
+        restore_render(page, result, files)
+        del page.render
+        self.used += 1
+
+    def on_post_build(self, config):
+        if self.config["enabled"] and self.used:
+            log.debug(f"Used {self.used} pre-converted page(s)")
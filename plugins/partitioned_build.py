@@ -0,0 +1,274 @@
+"""年単位のパーティション (`2025-cloud-service` 等の先頭の年) で、過去の年の出力を凍結して再利用するプラグイン。
+
+- `frozen_years` で指定した年 (`freeze_past_years: true` なら今年より前のすべての年) を凍結する
+- 凍結したパーティションは、最初のビルドで各ページの最終的な HTML を `.cache/partitions/<年>/` に保存する
+- 次のビルドからは、パーティションのキーが一致すればテーマのテンプレート描画を省き、保存した HTML をそのまま出力する
+  (Markdown の変換は render_cache で省かれる。検索インデックス等のためにページのイベント自体は通す)
+- キーはパーティション内の .md / .memo の署名、サイト全体の設定・テーマ・プラグインの設定・パッケージの版、
+  このリポジトリのプラグイン・マクロ・hooks のコード、nav の骨組み (タブとセクションの並び) から作る
+- Material は全ページに nav 全体を描画するが、毎週の記事の追加で凍結分を描画し直しては意味が無いので、
+  既定ではセクション内のページの増減は無視し、凍結したページの nav は凍結時点のままにする
+  代わりに凍結から `refreeze_days` 日 (既定 7 日) 経ったパーティションは描画し直し、nav を追いつかせる
+  `nav_sensitive: true` にすると nav が少しでも変われば描画し直す (記事を足す度に全年が描画される)
+- 警告の出たビルド (`--strict` なら中断される) ではマニフェストを保存せず、次のビルドも描画し直す
+- ルートの nav は今まで通り hooks.py (update_root_pages) が全体から生成する
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from mkdocs.config import config_options
+from mkdocs.exceptions import PluginError
+from mkdocs.plugins import BasePlugin, event_priority, get_plugin_logger
+from mkdocs.structure.files import Files
+from mkdocs.structure.nav import Navigation, Section
+from mkdocs.structure.pages import Page
+
+from plugins.page_meta import file_signature, memo_path_for
+from plugins.render_cache import BuildWarnings
+
+log = get_plugin_logger("partitioned_build")
+
+MANIFEST_VERSION = 2
+FROZEN_TEMPLATE = "partition_frozen.html"
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+PARTITION_PATTERN = re.compile(r"^(\d{4})-[^/]+/")
+# テーマの描画結果に影響する設定 (nav と各ページの内容は別に扱う)
+SITE_KEYS = (
+    "site_name", "site_url", "site_description", "site_author", "copyright", "repo_url", "repo_name",
+    "edit_uri", "extra", "extra_css", "extra_javascript", "use_directory_urls", "markdown_extensions", "mdx_configs",
+)
+PACKAGES = ("mkdocs", "mkdocs-material", "Markdown")
+# 出力に影響するこのリポジトリのコード (mkdocs.yml からの相対パス。hooks は config["hooks"] から取る)
+LOCAL_CODE_DIRS = ("plugins", "macros")
+
+
+def partition_of(src_uri: str) -> Optional[str]:
+    match = PARTITION_PATTERN.match(src_uri)
+    return match.group(1) if match else None
+
+
+def nav_items(items) -> List[Any]:
+    out: List[Any] = []
+    for item in items:
+        if isinstance(item, Section):
+            out.append([item.title, nav_items(item.children)])
+        else:
+            out.append([item.title, getattr(item, "url", None)])
+    return out
+
+
+def nav_outline(items) -> List[Any]:
+    """nav のうちセクションの並びとタイトルだけ (タブとセクションの見出し。記事の追加では変わらない)。"""
+    return [[item.title, nav_outline(item.children)] for item in items if isinstance(item, Section)]
+
+
+def tree_signatures(root: Path) -> List[Any]:
+    if not root.is_dir():
+        return []
+    # __pycache__ は Python の版や compileall で作り直されるだけなので含めない
+    return sorted(
+        [path.relative_to(root).as_posix(), file_signature(str(path))]
+        for path in root.rglob("*")
+        if path.is_file() and "__pycache__" not in path.relative_to(root).parts
+    )
+
+
+def site_digest(config) -> str:
+    """全ページの描画に共通する入力 (設定・テーマ・オーバーライド・プラグイン・パッケージの版・ローカルのコード) のハッシュ。"""
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = version(name)
+        except PackageNotFoundError:
+            packages[name] = None
+    theme = config["theme"]
+    config_dir = Path(config["config_file_path"] or ".").resolve().parent
+    code = {name: tree_signatures(config_dir / name) for name in LOCAL_CODE_DIRS}
+    code["hooks"] = sorted([str(path), file_signature(str(path))] for path in config.get("hooks") or [])
+    data = {
+        "site": {key: config.get(key) for key in SITE_KEYS},
+        "theme": {"name": theme.name, "options": dict(theme), "custom_dir": tree_signatures(Path(theme.custom_dir)) if theme.custom_dir else []},
+        # hooks はモジュールなので config を持たない
+        "plugins": {name: dict(getattr(plugin, "config", None) or {}) for name, plugin in config["plugins"].items()},
+        "code": code,
+        "packages": packages,
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Partition:
+    year: str
+    frozen: bool
+    pages: Dict[str, Page] = field(default_factory=dict)
+    key: str = ""
+    reused: bool = False
+    captured: Dict[str, str] = field(default_factory=dict)
+
+
+class Plugin(BasePlugin):
+    config_scheme = (
+        ("enabled", config_options.Type(bool, default=True)),
+        ("frozen_years", config_options.Type(list, default=[])),
+        ("freeze_past_years", config_options.Type(bool, default=False)),
+        ("nav_sensitive", config_options.Type(bool, default=False)),
+        ("refreeze_days", config_options.Type(int, default=7)),
+        ("artifact_dir", config_options.Type(str, default=".cache/partitions")),
+    )
+
+    def on_config(self, config):
+        if not self.config["enabled"]:
+            return
+        artifact_dir = Path(self.config["artifact_dir"])
+        if not artifact_dir.is_absolute():
+            artifact_dir = Path(config["config_file_path"] or ".").resolve().parent / artifact_dir
+        self.artifact_dir = artifact_dir
+        self.frozen_years = {str(year) for year in self.config["frozen_years"]}
+        self.current_year = date.today().year
+        self.partitions: Dict[str, Partition] = {}
+        self.warnings = BuildWarnings()
+        # 凍結ページ用の空テンプレートを、最も優先度の低いテーマディレクトリとして足す (.html は静的ファイルとしては出力されない)
+        config["theme"].dirs.append(str(TEMPLATE_DIR))
+
+    def is_frozen(self, year: str) -> bool:
+        return year in self.frozen_years or (self.config["freeze_past_years"] and int(year) < self.current_year)
+
+    def partition_dir(self, year: str) -> Path:
+        return self.artifact_dir / year
+
+    def load_manifest(self, year: str) -> Optional[Dict[str, Any]]:
+        try:
+            manifest = json.loads((self.partition_dir(year) / "manifest.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+    def artifact_path(self, year: str, src_uri: str) -> Path:
+        return self.partition_dir(year) / "pages" / f"{hashlib.sha1(src_uri.encode('utf-8')).hexdigest()}.html"
+
+    def partition_key(self, partition: Partition, common: str) -> str:
+        sources = sorted(
+            [src_uri, file_signature(page.file.abs_src_path), file_signature(memo_path_for(page.file.abs_src_path))]
+            for src_uri, page in partition.pages.items()
+        )
+        data = json.dumps([common, sources], default=str)
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    # awesome-pages などが nav を組み立て終わってから、パーティション毎に再利用できるかを決める
+    @event_priority(-100)
+    def on_nav(self, nav: Navigation, config, files: Files):
+        if not self.config["enabled"]:
+            return nav
+        for page in nav.pages:
+            year = partition_of(page.file.src_uri)
+            if year is None:
+                continue
+            partition = self.partitions.get(year)
+            if partition is None:
+                partition = self.partitions[year] = Partition(year, self.is_frozen(year))
+            partition.pages[page.file.src_uri] = page
+
+        common = site_digest(config)
+        outline = nav_items(nav.items) if self.config["nav_sensitive"] else nav_outline(nav.items)
+        common += hashlib.sha1(json.dumps(outline, ensure_ascii=False).encode("utf-8")).hexdigest()
+        for year, partition in sorted(self.partitions.items()):
+            if not partition.frozen:
+                continue
+            partition.key = self.partition_key(partition, common)
+            manifest = self.load_manifest(year)
+            partition.reused = bool(
+                manifest
+                and manifest.get("key") == partition.key
+                and sorted(manifest.get("pages", [])) == sorted(partition.pages)
+                and not self.expired(manifest)
+                and all(self.artifact_path(year, src_uri).is_file() for src_uri in partition.pages)
+            )
+            if not partition.reused:
+                # 描画し直す間に古い成果物を使わないよう、先にマニフェストを消す
+                shutil.rmtree(self.partition_dir(year), ignore_errors=True)
+        return nav
+
+    def expired(self, manifest: Dict[str, Any]) -> bool:
+        """凍結から refreeze_days 日経ったか (0 以下なら期限なし)。"""
+        days = self.config["refreeze_days"]
+        if days <= 0:
+            return False
+        try:
+            frozen_on = date.fromisoformat(manifest.get("frozen_on", ""))
+        except ValueError:
+            return True
+        return date.today() - frozen_on >= timedelta(days=days)
+
+    def partition_for(self, page: Page) -> Optional[Partition]:
+        if not self.config["enabled"]:
+            return None
+        year = partition_of(page.file.src_uri)
+        return self.partitions.get(year) if year else None
+
+    # テンプレートは page_context より前に page.meta から選ばれるので、ここで空のテンプレートに差し替える
+    def on_page_content(self, html, page: Page, config, files: Files):
+        partition = self.partition_for(page)
+        if partition is not None and partition.reused:
+            page.meta["template"] = FROZEN_TEMPLATE
+        return html
+
+    @event_priority(-100)
+    def on_post_page(self, output: str, page: Page, config):
+        partition = self.partition_for(page)
+        if partition is None or not partition.frozen:
+            return output
+        src_uri = page.file.src_uri
+        path = self.artifact_path(partition.year, src_uri)
+        if partition.reused:
+            try:
+                return path.read_text(encoding="utf-8")
+            except OSError as exc:
+                raise PluginError(f"Frozen output for {src_uri} is missing ({exc}); delete {self.artifact_dir} and rebuild")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(output, encoding="utf-8")
+        partition.captured[src_uri] = path.name
+        return output
+
+    def on_post_build(self, config):
+        if not self.config["enabled"]:
+            return
+        # 警告の出たページを凍結すると、次からは描画されず警告も出ないので保存しない
+        warnings = self.warnings.close()
+        summary = []
+        for year, partition in sorted(self.partitions.items()):
+            if not partition.frozen:
+                summary.append(f"{year} rendered ({len(partition.pages)} pages)")
+            elif partition.reused:
+                summary.append(f"{year} reused ({len(partition.pages)} pages)")
+            else:
+                # 警告が無く、すべてのページを保存できたときだけマニフェストを書き、次のビルドから再利用する
+                if warnings:
+                    summary.append(f"{year} rendered ({len(partition.pages)} pages, not frozen after {warnings} warning(s))")
+                    continue
+                if set(partition.captured) == set(partition.pages):
+                    manifest_path = self.partition_dir(year) / "manifest.json"
+                    tmp_path = manifest_path.with_name(f"manifest.json.{os.getpid()}.tmp")
+                    tmp_path.write_text(json.dumps({
+                        "version": MANIFEST_VERSION,
+                        "key": partition.key,
+                        "frozen_on": date.today().isoformat(),
+                        "pages": sorted(partition.captured),
+                    }, ensure_ascii=False), encoding="utf-8")
+                    os.replace(tmp_path, manifest_path)
+                summary.append(f"{year} frozen ({len(partition.pages)} pages saved)")
+        if summary:
+            log.info("Partitions: " + ", ".join(summary))
+
+    def on_build_error(self, error):
+        if self.config["enabled"] and hasattr(self, "warnings"):
+            self.warnings.close()
@@ -0,0 +1,346 @@
+"""変更の無い記事の Markdown 変換結果 (HTML と目次) をビルドを跨いで再利用するプラグイン。
+
+- キーはページの Markdown と URL のハッシュに、Markdown 拡張の設定と関係するパッケージの版を加えたもの
+- キャッシュが当たったページは macros の Jinja 処理と `page.render` (Markdown 変換) を省き、保存した HTML を使う
+- Jinja の記法 (`{{` / `{%` / `{#`) を含むページはナビゲーション等で結果が変わるので、キャッシュしない
+- 相対リンクの参照先ファイルの有無も記録し、リンク先が増減したページは変換し直す
+- 変換中に出たリンク切れ等のログ (`mkdocs.structure.pages`) もエントリに残し、当たったときに出し直す
+- エントリはビルドの最後にまとめて書き込む。警告が出たビルド (`--strict` なら中断される) では新しいエントリを保存しない
+- キャッシュは `mkdocs.yml` と同じ階層の `.cache/render_cache/` にページ毎の JSON で置き、
+  ビルドの最後にヒット率を表示する
+- 変換結果の保存と復元には Page の内部属性 (`_title_from_render` 等) を使うので、
+  使っている MkDocs にそれらが無ければ警告してキャッシュを無効にする (通常の変換になる)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+from dataclasses import dataclass
+from functools import partial
+from importlib.metadata import PackageNotFoundError, version
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from mkdocs.config import config_options
+from mkdocs.plugins import BasePlugin, CombinedEvent, event_priority, get_plugin_logger
+from mkdocs.structure.files import File, Files
+from mkdocs.structure.pages import Page
+from mkdocs.structure.toc import get_toc
+from mkdocs.utils import CountHandler
+
+from plugins.page_meta import file_signature
+
+log = get_plugin_logger("render_cache")
+
+CACHE_VERSION = 2
+PAGES_LOGGER = "mkdocs.structure.pages"
+JINJA_MARKERS = ("{{", "{%", "{#")
+# Markdown のリンク・画像と HTML の href/src のうち、スキームもルートも無い相対パス
+# render_result / restore_render が読み書きする、Page.render が設定する内部属性
+RENDER_ATTRIBUTES = ("_title_from_render", "present_anchor_ids", "links_to_anchors")
+LINK_PATTERN = re.compile(r"""\]\(\s*<?([^)\s>]+)|(?:href|src)=["']([^"']+)["']""")
+SCHEME_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+
+    def format(self) -> str:
+        cacheable = self.hits + self.misses
+        rate = self.hits / cacheable * 100 if cacheable else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), {self.uncacheable} uncacheable"
+
+
+class RecordCollector(logging.Handler):
+    """ロガーに出たレコードを (レベル, メッセージ) で集める。出し直すときは同じロガーに流す。"""
+
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.records: List[Tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((record.levelno, record.getMessage()))
+
+
+class BuildWarnings:
+    """ビルド中に mkdocs のロガーに出た警告を数える (MkDocs が strict で中断する判定は on_post_build の後なので自前で数える)。"""
+
+    def __init__(self) -> None:
+        self.counter = CountHandler()
+        self.counter.setLevel(logging.WARNING)
+        logging.getLogger("mkdocs").addHandler(self.counter)
+
+    def close(self) -> int:
+        """数えるのをやめて、それまでの警告の数を返す。"""
+        logging.getLogger("mkdocs").removeHandler(self.counter)
+        return sum(count for _, count in self.counter.get_counts())
+
+
+def replay_records(records: List[Tuple[int, str]]) -> None:
+    logger = logging.getLogger(PAGES_LOGGER)
+    for level, message in records:
+        logger.log(level, message)
+
+
+def package_versions(extensions: List[Any]) -> Dict[str, Any]:
+    """mkdocs / Markdown の版と、文字列で指定された Markdown 拡張のモジュールファイルの署名。"""
+    versions: Dict[str, Any] = {}
+    for name in ("mkdocs", "Markdown"):
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = None
+    for extension in extensions:
+        if not isinstance(extension, str):
+            continue
+        module = extension.split(":")[0]
+        try:
+            spec = find_spec(module)
+        except (ImportError, ValueError):
+            spec = None
+        versions[module] = file_signature(spec.origin) if spec is not None and spec.origin else None
+    return versions
+
+
+def environment_digest(config) -> str:
+    """変換結果に影響する設定と版のハッシュ。ここが変わるとすべてのエントリが無効になる。"""
+    extensions = config["markdown_extensions"]
+    data = {
+        "version": CACHE_VERSION,
+        "extensions": [extension if isinstance(extension, str) else type(extension).__qualname__ for extension in extensions],
+        "mdx_configs": config["mdx_configs"] or {},
+        "use_directory_urls": config["use_directory_urls"],
+        "packages": package_versions(extensions),
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def link_targets(markdown: str, src_uri: str) -> List[str]:
+    """ページからの相対リンクが指す docs_dir 内のパス (変換結果は参照先の有無で変わる)。"""
+    base = posixpath.dirname(src_uri)
+    targets = set()
+    for match in LINK_PATTERN.finditer(markdown):
+        target = (match.group(1) or match.group(2)).split("#", 1)[0].split("?", 1)[0]
+        if not target or target.startswith("/") or SCHEME_PATTERN.match(target):
+            continue
+        targets.add(posixpath.normpath(posixpath.join(base, target)))
+    return sorted(targets)
+
+
+def toc_tokens(items) -> List[Dict[str, Any]]:
+    return [
+        {"level": item.level, "id": item.id, "name": item.title, "children": toc_tokens(item.children)}
+        for item in items
+    ]
+
+
+def missing_render_attributes(config) -> List[str]:
+    """RENDER_ATTRIBUTES のうち、使っている MkDocs の Page に無いもの (MkDocs の版が変わったときの確認)。"""
+    probe = File("render_cache_probe.md", config["docs_dir"], config["site_dir"], config["use_directory_urls"])
+    page = Page(None, probe, config)
+    return [name for name in RENDER_ATTRIBUTES if not hasattr(page, name)]
+
+
+def render_result(page: Page, html: str) -> Dict[str, Any]:
+    """`Page.render` が設定する値を JSON にできる形で取り出す (restore_render で元に戻せる)。"""
+    return {
+        "content": html,
+        "toc": toc_tokens(page.toc),
+        "title": page._title_from_render,
+        "anchors": sorted(page.present_anchor_ids or ()),
+        "links_to_anchors": None if page.links_to_anchors is None else {
+            file.src_uri: links for file, links in page.links_to_anchors.items()
+        },
+    }
+
+
+def restore_render(page: Page, entry: Dict[str, Any], files: Files) -> None:
+    page.content = entry["content"]
+    page.toc = get_toc(entry["toc"])
+    page._title_from_render = entry["title"]
+    page.present_anchor_ids = set(entry["anchors"])
+    if entry.get("links_to_anchors") is not None:
+        page.links_to_anchors = {
+            files.get_file_from_path(src_uri): links
+            for src_uri, links in entry["links_to_anchors"].items()
+            if files.get_file_from_path(src_uri) is not None
+        }
+
+
+class Plugin(BasePlugin):
+    config_scheme = (
+        ("enabled", config_options.Type(bool, default=True)),
+        ("cache_dir", config_options.Type(str, default=".cache/render_cache")),
+    )
+
+    def on_config(self, config):
+        if not self.config["enabled"]:
+            return
+        missing = missing_render_attributes(config)
+        if missing:
+            log.warning(
+                f"Render cache disabled: this MkDocs version has no Page.{', Page.'.join(missing)}; "
+                "pages are rendered normally"
+            )
+            self.config["enabled"] = False
+            return
+        cache_dir = Path(self.config["cache_dir"])
+        if not cache_dir.is_absolute():
+            cache_dir = Path(config["config_file_path"] or ".").resolve().parent / cache_dir
+        self.cache_dir = cache_dir
+        self.environment = environment_digest(config)
+        self.stats = CacheStats()
+        # src_uri -> (キー, 変換前の Markdown)。当たったページと、保存するページの両方を覚えておく
+        self.pending: Dict[str, Tuple[str, str]] = {}
+        self.hit_pages: set = set()
+        self.seen: set = set()
+        self.present: set = set()
+        # src_uri -> 今回変換したページのエントリ。警告の無いビルドだけ on_post_build で書き込む
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.collector = RecordCollector()
+        logging.getLogger(PAGES_LOGGER).addHandler(self.collector)
+        self.warnings = BuildWarnings()
+
+    def on_files(self, files: Files, config):
+        if self.config["enabled"]:
+            self.present = {file.src_uri for file in files if file.is_documentation_page()}
+        return files
+
+    def entry_path(self, src_uri: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(src_uri.encode('utf-8')).hexdigest()}.json"
+
+    def page_key(self, markdown: str, page: Page) -> str:
+        data = f"{self.environment}\0{page.file.src_uri}\0{page.url}\0{markdown}"
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def load_entry(self, src_uri: str, key: str, files: Files) -> Optional[Dict[str, Any]]:
+        try:
+            entry = json.loads(self.entry_path(src_uri).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != key:
+            return None
+        for target, existed in entry.get("links", {}).items():
+            if (files.get_file_from_path(target) is not None) != existed:
+                return None
+        return entry
+
+    def would_hit(self, markdown: str, page: Page, files: Files) -> bool:
+        """ページの変換結果がキャッシュにあるか (parallel_markdown が変換を省くページを決めるのに使う)。"""
+        if not self.config["enabled"] or any(marker in markdown for marker in JINJA_MARKERS):
+            return False
+        return self.load_entry(page.file.src_uri, self.page_key(markdown, page), files) is not None
+
+    # macros (priority 0) より前に判定し、当たったページは Jinja の処理も省く
+    @event_priority(100)
+    def _on_page_markdown_lookup(self, markdown, page: Page, config, files: Files):
+        if not self.config["enabled"]:
+            return markdown
+        src_uri = page.file.src_uri
+        self.seen.add(src_uri)
+        if any(marker in markdown for marker in JINJA_MARKERS):
+            self.stats.uncacheable += 1
+            return markdown
+        key = self.page_key(markdown, page)
+        self.pending[src_uri] = (key, markdown)
+        entry = self.load_entry(src_uri, key, files)
+        if entry is None:
+            log.debug(f"Render cache miss: {src_uri}")
+            self.stats.misses += 1
+            return markdown
+        self.stats.hits += 1
+        self.hit_pages.add(src_uri)
+        page.meta["render_macros"] = False
+        # インスタンス属性で Page.render を隠し、MkDocs が呼ぶ変換を保存した結果の復元に置き換える
+        page.render = partial(self.restore, page, entry)
+        return markdown
+
+    # 他のプラグインがすべて終わった後で、Markdown が判定時のままか確かめる
+    @event_priority(-100)
+    def _on_page_markdown_verify(self, markdown, page: Page, config, files: Files):
+        if not self.config["enabled"]:
+            return markdown
+        # ここから on_page_content までに出るのは、このページの変換 (page.render) のログだけ
+        self.collector.records = []
+        src_uri = page.file.src_uri
+        if src_uri not in self.hit_pages:
+            return markdown
+        page.meta.pop("render_macros", None)
+        if markdown.rstrip("\n") != self.pending[src_uri][1].rstrip("\n"):
+            self.hit_pages.discard(src_uri)
+            del page.render
+            self.stats.hits -= 1
+            self.stats.misses += 1
+        return markdown
+
+    on_page_markdown = CombinedEvent(_on_page_markdown_lookup, _on_page_markdown_verify)
+
+    def restore(self, page: Page, entry: Dict[str, Any], config, files: Files) -> None:
+        replay_records([tuple(record) for record in entry.get("records", [])])
+        restore_render(page, entry, files)
+
+    # 他のプラグインが HTML を書き換える前の、変換直後の結果を保存する
+    @event_priority(100)
+    def on_page_content(self, html, page: Page, config, files: Files):
+        if not self.config["enabled"]:
+            return html
+        src_uri = page.file.src_uri
+        pending = self.pending.pop(src_uri, None)
+        if src_uri in self.hit_pages:
+            del page.render
+            return html
+        if pending is None:
+            return html
+        key, source = pending
+        # macros (Jinja) は末尾の改行を 1 つ落とすが、Markdown の変換結果は変わらない
+        if page.markdown.rstrip("\n") != source.rstrip("\n"):
+            # 他のプラグインが Markdown を書き換えたページは、キーと結果が対応しないので保存しない
+            return html
+        self.entries[src_uri] = {
+            "key": key,
+            **render_result(page, html),
+            "links": {target: files.get_file_from_path(target) is not None for target in link_targets(source, src_uri)},
+            "records": self.collector.records,
+        }
+        return html
+
+    def save_entry(self, src_uri: str, entry: Dict[str, Any]) -> None:
+        path = self.entry_path(src_uri)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def stop_logging(self) -> int:
+        logging.getLogger(PAGES_LOGGER).removeHandler(self.collector)
+        return self.warnings.close()
+
+    def on_post_build(self, config):
+        if not self.config["enabled"]:
+            return
+        warnings = self.stop_logging()
+        if warnings:
+            log.info(f"Render cache: not saving {len(self.entries)} new entries after {warnings} warning(s)")
+        else:
+            for src_uri, entry in self.entries.items():
+                self.save_entry(src_uri, entry)
+        # 今回のビルドに無いページ (削除・除外されたページ) のエントリを消す
+        # (dirty ビルドで描画を省いたページは、ファイルがあれば残す)
+        keep = {self.entry_path(src_uri).name for src_uri in self.seen | self.present}
+        if self.cache_dir.is_dir():
+            for path in self.cache_dir.glob("*.json"):
+                if path.name not in keep:
+                    path.unlink(missing_ok=True)
+        log.info(f"Render cache: {self.stats.format()}")
+
+    def on_build_error(self, error):
+        if self.config["enabled"] and hasattr(self, "warnings"):
+            self.stop_logging()
@@ -0,0 +1,258 @@
+"""`mkdocs serve --dirty` の再ビルドで、編集の影響を受けるページだけを描画し直すプラグイン。
+
+- 前回のビルドで記録した依存関係と入力ファイルの署名から、描画し直すページを決める
+  - ページ → 自身の .md と .memo
+  - Jinja の記法を含むページ (index.md の home_sections 等) → 全記事のメタデータ (いずれかの .md / .memo)
+  - nav → 各フォルダの .pages とページの一覧・タイトル (Material は全ページに nav を描画するので、変われば全ページ)
+  - 全ページ → mkdocs.yml の設定・テーマのオーバーライド・プラグインの設定とコード (site_digest)
+- 影響を受けないページは `File.is_modified` を False にし、MkDocs の dirty ビルドで読み込みも描画も省かせる
+- 省いたページのタイトルは前回の値に戻し、描画し直すページの nav や前後のリンクが変わらないようにする
+- nav と設定が変わっていなければ 404.html 等のテーマのテンプレートは前回の出力を使い、
+  コンパイル済みのテンプレートも再ビルドをまたいで使い回す
+- 削除されたページの出力は消す。ビルドが失敗したときは、次の再ビルドをすべてのページで行う
+- `mkdocs serve --dirty` のときだけ働く (`mkdocs build` や `--dirty` なしの serve では何もしない)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+
+import jinja2
+from mkdocs.plugins import BasePlugin, event_priority, get_plugin_logger
+from mkdocs.structure.files import File, Files
+from mkdocs.structure.nav import Navigation
+from mkdocs.structure.pages import Page
+
+from plugins.page_meta import Signature, file_signature, memo_path_for
+from plugins.partitioned_build import nav_items, site_digest
+from plugins.render_cache import JINJA_MARKERS
+
+log = get_plugin_logger("serve_dependencies")
+
+BUILD_LOGGER = "mkdocs.commands.build"
+DIRTY_WARNING = "A 'dirty' build is being performed"
+
+
+def modified() -> bool:
+    return True
+
+
+def unmodified() -> bool:
+    return False
+
+
+def page_inputs(file: File) -> List[Signature]:
+    """ページの出力を決める入力ファイル (.md と同じ名前の .memo) の署名。"""
+    return [file_signature(file.abs_src_path), file_signature(memo_path_for(file.abs_src_path))]
+
+
+def nav_digest(nav: Navigation) -> str:
+    # on_nav の時点ではどのページもまだ読んでいないので、タイトルは .pages とファイル名だけで決まる
+    return hashlib.sha1(json.dumps(nav_items(nav.items), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class MemoryBytecodeCache(jinja2.BytecodeCache):
+    """テーマの環境はビルド毎に作り直されるので、コンパイル結果をプロセス内に残す (ソースが変われば捨てられる)。"""
+
+    def __init__(self) -> None:
+        self.cache: Dict[str, bytes] = {}
+
+    def load_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        code = self.cache.get(bucket.key)
+        if code is not None:
+            bucket.bytecode_from_string(code)
+
+    def dump_bytecode(self, bucket: jinja2.bccache.Bucket) -> None:
+        self.cache[bucket.key] = bucket.bytecode_to_string()
+
+
+class ReusedTemplate:
+    """前回の出力をそのまま返すテンプレート (`render` だけを持つ)。"""
+
+    def __init__(self, output: str) -> None:
+        self.output = output
+
+    def render(self, context) -> str:
+        return self.output
+
+
+class DirtyWarningFilter(logging.Filter):
+    """依存関係で nav とリンクを保つので、dirty ビルド毎の「nav が不正確になる」警告は出さない。"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.getMessage().startswith(DIRTY_WARNING)
+
+
+@dataclass
+class PageRecord:
+    inputs: List[Signature]
+    title: Optional[str]
+    front_title: Any
+    uses_metadata: bool
+    dest_path: str
+
+
+@dataclass
+class BuildRecord:
+    site: str
+    nav: str
+    pages: Dict[str, PageRecord]
+    templates: Dict[str, str]
+
+
+class Plugin(BasePlugin):
+    # on_startup があるので、serve の再ビルドをまたいで同じインスタンスが使われる
+    def on_startup(self, *, command, dirty: bool) -> None:
+        self.active = command == "serve" and dirty
+        self.previous: Optional[BuildRecord] = None
+        self.bytecode_cache = MemoryBytecodeCache()
+        if self.active:
+            logging.getLogger(BUILD_LOGGER).addFilter(DirtyWarningFilter())
+
+    def on_config(self, config):
+        if not getattr(self, "active", False):
+            self.active = False
+            return
+        self.site = site_digest(config)
+        self.nav = ""
+        self.rebuild_all = True
+        self.templates: Dict[str, str] = {}
+        self.pages: Dict[str, Page] = {}
+        self.inputs: Dict[str, List[Signature]] = {}
+        self.dirty: Set[str] = set()
+        # on_page_markdown で読み取る、描画し直したページの front matter のタイトルと Jinja の有無
+        self.front_titles: Dict[str, Any] = {}
+        self.uses_metadata: Dict[str, bool] = {}
+
+    def changed_front_titles(self, changed: Set[str], config) -> List[str]:
+        """front matter の title が変わったページ (nav のタイトルが変わる)。"""
+        previous = self.previous
+        titles = []
+        for src_uri in sorted(changed):
+            record = previous.pages.get(src_uri)
+            page = self.pages[src_uri]
+            if record is None or not os.path.isfile(page.file.abs_src_path):
+                continue
+            page.read_source(config)
+            if (page.meta or {}).get("title") != record.front_title:
+                titles.append(src_uri)
+        return titles
+
+    # awesome-pages と partitioned_build の後、parallel_markdown (-200) が変換するページを選ぶより前に決める
+    @event_priority(-150)
+    def on_nav(self, nav: Navigation, config, files: Files):
+        if not self.active:
+            return nav
+        started = time.perf_counter()
+        self.nav = nav_digest(nav)
+        for file in files.documentation_pages():
+            if file.page is not None and file.abs_src_path:
+                self.pages[file.src_uri] = file.page
+                self.inputs[file.src_uri] = page_inputs(file)
+
+        previous = self.previous
+        if previous is None:
+            reason = "first build"
+        elif previous.site != self.site:
+            reason = "site config changed"
+        elif previous.nav != self.nav:
+            reason = "nav changed"
+        else:
+            changed = {
+                src_uri for src_uri, page in self.pages.items()
+                if src_uri not in previous.pages
+                or previous.pages[src_uri].inputs != self.inputs[src_uri]
+                or not os.path.isfile(page.file.abs_dest_path)
+            }
+            if self.changed_front_titles(changed, config):
+                reason = "page title changed"
+            else:
+                self.rebuild_all = False
+                self.dirty = set(changed)
+                if changed:
+                    self.dirty.update(
+                        src_uri for src_uri, record in previous.pages.items()
+                        if record.uses_metadata and src_uri in self.pages
+                    )
+                reason = ", ".join(sorted(changed)[:3]) + (" ..." if len(changed) > 3 else "") if changed else "no page changed"
+        if self.rebuild_all:
+            self.dirty = set(self.pages)
+
+        for src_uri, page in self.pages.items():
+            if src_uri in self.dirty:
+                page.file.is_modified = modified
+                continue
+            page.file.is_modified = unmodified
+            title = previous.pages[src_uri].title
+            if title is not None:
+                page.title = title
+        log.info(
+            f"Rebuilding {len(self.dirty)} of {len(self.pages)} page(s) ({reason}) "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms of dependency checks"
+        )
+        return nav
+
+    # macros (priority 0) や title_from_filename より前に、ソースのままの Markdown と front matter を見る
+    @event_priority(100)
+    def on_page_markdown(self, markdown, page: Page, config, files: Files):
+        if self.active:
+            src_uri = page.file.src_uri
+            self.front_titles[src_uri] = (page.meta or {}).get("title")
+            self.uses_metadata[src_uri] = any(marker in markdown for marker in JINJA_MARKERS)
+        return markdown
+
+    def on_env(self, env: jinja2.Environment, config, files: Files):
+        if self.active:
+            env.bytecode_cache = self.bytecode_cache
+        return env
+
+    # テーマのテンプレート (404.html, sitemap.xml) は nav と設定だけで決まるので、変わっていなければ描画しない
+    def on_pre_template(self, template, template_name: str, config):
+        if not self.active or self.rebuild_all:
+            return template
+        output = self.previous.templates.get(template_name)
+        return template if output is None else ReusedTemplate(output)
+
+    def on_post_template(self, output_content: str, template_name: str, config):
+        if self.active:
+            self.templates[template_name] = output_content
+        return output_content
+
+    def on_post_build(self, config):
+        if not self.active:
+            return
+        previous = self.previous
+        records: Dict[str, PageRecord] = {}
+        for src_uri, page in self.pages.items():
+            if src_uri in self.dirty:
+                records[src_uri] = PageRecord(
+                    inputs=self.inputs[src_uri],
+                    title=page.title,
+                    front_title=self.front_titles.get(src_uri),
+                    uses_metadata=self.uses_metadata.get(src_uri, False),
+                    dest_path=page.file.abs_dest_path,
+                )
+            else:
+                records[src_uri] = previous.pages[src_uri]
+
+        # 削除・改名されたページの出力を消す (同じ出力先を今のページが使っていれば残す)
+        if previous is not None:
+            dest_paths = {record.dest_path for record in records.values()}
+            for src_uri, record in previous.pages.items():
+                if src_uri not in records and record.dest_path not in dest_paths:
+                    try:
+                        os.remove(record.dest_path)
+                        # use_directory_urls の `<ページ>/` のように空になったディレクトリも消す
+                        os.removedirs(os.path.dirname(record.dest_path))
+                    except OSError:
+                        pass
+        self.previous = BuildRecord(self.site, self.nav, records, self.templates)
+
+    def on_build_error(self, error):
+        if getattr(self, "active", False):
+            self.previous = None
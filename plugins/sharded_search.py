@@ -0,0 +1,315 @@
+"""検索インデックスをカテゴリ/年フォルダ単位のシャードに分けて出力するプラグイン。
+
+- ページ毎に本文を抽出し、日本語は文字 2-gram、英数字は単語に分けたトークンを前計算する
+- `search/shards/<フォルダ名>.json` にシャード毎の文書と転置インデックスを書き出す
+- `search/shards/manifest.json` にはシャード毎のトークンの Bloom フィルタだけを載せる
+- Material の検索 UI から使うワーカーを差し替え、クエリに必要なシャードだけを新しい順に読み込む
+  (`replace_builtin: true` のときは search_index.json を空の設定だけに置き換える)
+- ページ毎の索引 (断片) を内容のハッシュで保持し、`mkdocs serve` の再ビルドでは
+  変わったページだけを索引し直して、変わったシャードだけを組み立て直す
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import html
+import json
+import re
+import time
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mkdocs.config import config_options
+from mkdocs.plugins import BasePlugin, get_plugin_logger
+from mkdocs.structure.pages import Page
+
+from plugins.page_meta import DATE_PATTERN
+
+log = get_plugin_logger("sharded_search")
+
+MANIFEST_VERSION = 1
+ROOT_SHARD = "_root"
+WORKER_ASSET = Path(__file__).resolve().parent / "assets" / "sharded_search_worker.js"
+WORKER_URL_PATTERN = re.compile(r'("search":\s*")([^"]*?)assets/javascripts/workers/search\.[0-9a-f]+\.min\.js"')
+
+# 英数字の単語と、かな・カナ・漢字の連続 (ワーカーの TOKEN_PATTERN と同じ範囲にすること)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff]+")
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+TITLE_WEIGHT = 10
+
+FNV_OFFSET = 0x811C9DC5
+FNV_OFFSET_ALT = 0x9747B28C
+FNV_PRIME = 0x01000193
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: str, ngram: int = 2) -> List[str]:
+    """英数字は単語、日本語は ngram 文字ずつずらした部分文字列に分ける (短い連続はそのまま)。"""
+    tokens: List[str] = []
+    for match in TOKEN_PATTERN.finditer(normalize(text)):
+        run = match.group(0)
+        if run.isascii():
+            tokens.append(run)
+        elif len(run) <= ngram:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + ngram] for i in range(len(run) - ngram + 1))
+    return tokens
+
+
+def html_to_text(content: str) -> str:
+    return SPACE_PATTERN.sub(" ", html.unescape(TAG_PATTERN.sub(" ", content))).strip()
+
+
+def fnv1a(data: bytes, seed: int) -> int:
+    value = seed
+    for byte in data:
+        value = ((value ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    return value
+
+
+class BloomFilter:
+    """ワーカー側 (sharded_search_worker.js) と同じハッシュで作る Bloom フィルタ。"""
+
+    def __init__(self, size: int, hashes: int):
+        self.size = max(64, (size + 7) // 8 * 8)
+        self.hashes = hashes
+        self.bits = bytearray(self.size // 8)
+
+    def positions(self, token: str) -> Iterable[int]:
+        data = token.encode("utf-8")
+        h1 = fnv1a(data, FNV_OFFSET)
+        h2 = fnv1a(data, FNV_OFFSET_ALT) | 1
+        for i in range(self.hashes):
+            yield ((h1 + i * h2) & 0xFFFFFFFF) % self.size
+
+    def add(self, token: str) -> None:
+        for position in self.positions(token):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def to_json(self) -> Dict:
+        return {"m": self.size, "k": self.hashes, "bits": base64.b64encode(bytes(self.bits)).decode("ascii")}
+
+
+@dataclass
+class SearchDoc:
+    location: str
+    title: str
+    text: str
+    date: str = ""
+    terms: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class Fragment:
+    digest: str
+    doc: Optional[SearchDoc]
+
+
+@dataclass
+class ShardOutput:
+    signature: Tuple[Tuple[str, str], ...]
+    payload: bytes
+    entry: Dict
+
+
+class FragmentStore:
+    """serve の再ビルドをまたいで、ページ毎の索引断片と組み立て済みのシャードを保持する。"""
+
+    def __init__(self) -> None:
+        self.options: Tuple = ()
+        self.fragments: Dict[str, Fragment] = {}
+        self.shards: Dict[str, ShardOutput] = {}
+
+    def configure(self, options: Tuple) -> None:
+        # トークン化や Bloom フィルタの設定が変わったら、保持している断片は使えない
+        if options != self.options:
+            self.options = options
+            self.fragments.clear()
+            self.shards.clear()
+
+
+_STORES: Dict[str, FragmentStore] = {}
+
+
+def get_fragment_store(config) -> FragmentStore:
+    key = str(Path(config["docs_dir"]).resolve())
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = FragmentStore()
+    return store
+
+
+def page_digest(page: Page) -> str:
+    meta = page.meta or {}
+    excluded = bool((meta.get("search") or {}).get("exclude"))
+    data = f"{page.url}\0{page.title or ''}\0{excluded}\0{page.content or ''}"
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def shard_name_for(src_uri: str) -> str:
+    return src_uri.split("/", 1)[0] if "/" in src_uri else ROOT_SHARD
+
+
+def build_shard(docs: List[SearchDoc], snippet_length: int) -> Dict:
+    postings: Dict[str, List[int]] = {}
+    for index, doc in enumerate(docs):
+        for token, weight in doc.terms.items():
+            postings.setdefault(token, []).extend((index, weight))
+    return {
+        "docs": [
+            {"location": doc.location, "title": doc.title, "text": doc.text[:snippet_length]}
+            for doc in docs
+        ],
+        "terms": postings,
+    }
+
+
+class Plugin(BasePlugin):
+    config_scheme = (
+        ("shard_dir", config_options.Type(str, default="search/shards")),
+        ("ngram", config_options.Type(int, default=2)),
+        ("snippet_length", config_options.Type(int, default=400)),
+        ("bloom_bits_per_token", config_options.Type(int, default=8)),
+        ("bloom_hashes", config_options.Type(int, default=3)),
+        ("result_limit", config_options.Type(int, default=30)),
+        ("replace_builtin", config_options.Type(bool, default=True)),
+    )
+
+    def on_config(self, config):
+        if not self.config["replace_builtin"]:
+            return
+        # Material の検索プラグインの索引は search_index.json ごと捨てるので、作らせない
+        for name in ("material/search", "search"):
+            builtin = config["plugins"].get(name)
+            search_index = getattr(builtin, "search_index", None)
+            if search_index is not None:
+                search_index.add_entry_from_context = lambda page: None
+
+    def on_pre_build(self, config):
+        self.store = get_fragment_store(config)
+        self.store.configure(tuple(sorted(self.config.items())))
+        self.seen: List[str] = []
+        self.present: List[str] = []
+        self.indexed = 0
+        self.reused = 0
+
+    def on_files(self, files, config):
+        self.present = [file.src_uri for file in files if file.is_documentation_page()]
+        return files
+
+    def index_page(self, page: Page) -> Optional[SearchDoc]:
+        meta = page.meta or {}
+        if (meta.get("search") or {}).get("exclude"):
+            return None
+        title = page.title or ""
+        text = html_to_text(page.content or "")
+        terms = Counter(tokenize(text, self.config["ngram"]))
+        for token in tokenize(title, self.config["ngram"]):
+            terms[token] += TITLE_WEIGHT
+        match = DATE_PATTERN.search(page.file.src_uri)
+        return SearchDoc(page.url, title, text, match.group(1) if match else "", terms)
+
+    def on_page_context(self, context, page: Page, config, nav):
+        src_uri = page.file.src_uri
+        digest = page_digest(page)
+        fragment = self.store.fragments.get(src_uri)
+        if fragment is not None and fragment.digest == digest:
+            self.reused += 1
+        else:
+            self.store.fragments[src_uri] = Fragment(digest, self.index_page(page))
+            self.indexed += 1
+        self.seen.append(src_uri)
+        return context
+
+    def on_post_page(self, output: str, page: Page, config):
+        if not self.config["replace_builtin"]:
+            return output
+        shard_dir = self.config["shard_dir"].strip("/")
+        return WORKER_URL_PATTERN.sub(rf'\g<1>\g<2>{shard_dir}/worker.js"', output, count=1)
+
+    def build_output(self, name: str, docs: List[SearchDoc], signature) -> ShardOutput:
+        payload = json.dumps(build_shard(docs, self.config["snippet_length"]), ensure_ascii=False, separators=(",", ":"))
+        data = payload.encode("utf-8")
+        tokens = set()
+        for doc in docs:
+            tokens.update(doc.terms)
+        bloom = BloomFilter(len(tokens) * self.config["bloom_bits_per_token"], self.config["bloom_hashes"])
+        for token in tokens:
+            bloom.add(token)
+        entry = {
+            "name": name,
+            "url": f"{name}.json",
+            "docs": len(docs),
+            "bytes": len(data),
+            "latest": max((doc.date for doc in docs), default=""),
+            "bloom": bloom.to_json(),
+        }
+        return ShardOutput(signature, data, entry)
+
+    def on_post_build(self, config):
+        started = time.perf_counter()
+        site_dir = Path(config["site_dir"])
+        shard_dir = site_dir / self.config["shard_dir"]
+        shard_dir.mkdir(parents=True, exist_ok=True)
+
+        # 今回のビルドに無いページ (削除・除外されたページ) の断片は捨てる
+        # (dirty ビルドで描画を省いたページは、ファイルがあれば前回の断片を使う)
+        keep = set(self.seen) | set(self.present)
+        for src_uri in [src_uri for src_uri in self.store.fragments if src_uri not in keep]:
+            del self.store.fragments[src_uri]
+
+        grouped: Dict[str, List[Tuple[str, Fragment]]] = {}
+        for src_uri in sorted(self.store.fragments):
+            fragment = self.store.fragments[src_uri]
+            if fragment.doc is not None:
+                grouped.setdefault(shard_name_for(src_uri), []).append((src_uri, fragment))
+
+        rebuilt = 0
+        outputs: Dict[str, ShardOutput] = {}
+        for name, members in grouped.items():
+            signature = tuple((src_uri, fragment.digest) for src_uri, fragment in members)
+            output = self.store.shards.get(name)
+            if output is None or output.signature != signature:
+                output = self.build_output(name, [fragment.doc for _, fragment in members], signature)
+                rebuilt += 1
+            outputs[name] = output
+            path = shard_dir / output.entry["url"]
+            if not path.is_file() or path.stat().st_size != len(output.payload) or output is not self.store.shards.get(name):
+                path.write_bytes(output.payload)
+        self.store.shards = outputs
+
+        # 新しい記事を含むシャードから順に読み込めるよう、最新日付の降順に並べる
+        entries = sorted((output.entry for output in outputs.values()), key=lambda entry: (entry["latest"], entry["name"]), reverse=True)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "ngram": self.config["ngram"],
+            "result_limit": self.config["result_limit"],
+            "shards": entries,
+        }
+        (shard_dir / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        (shard_dir / "worker.js").write_text(WORKER_ASSET.read_text(encoding="utf-8"), encoding="utf-8")
+
+        if self.config["replace_builtin"]:
+            self.replace_builtin_index(site_dir)
+        log.info(
+            f"{self.indexed} page(s) indexed, {self.reused} reused; "
+            f"merged {len(outputs)} shard(s) ({rebuilt} rebuilt) in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    def replace_builtin_index(self, site_dir: Path) -> None:
+        """Material は search_index.json をワーカーに渡すだけなので、設定だけ残して本文を捨てる。"""
+        index_path = site_dir / "search" / "search_index.json"
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        index["docs"] = []
+        index_path.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
@@ -5,14 +5,22 @@ setup(
     version="0.1.0",
     description="MkDocs plugin: use .memo file as description",
     packages=find_packages(),
-    install_requires=["mkdocs"],
+    install_requires=["mkdocs>=1.6,<2"],
     entry_points={
         "mkdocs.plugins": [
             "description_from_memo = plugins.description_from_memo:Plugin",
             "title_from_filename = plugins.title_from_filename:Plugin",
             "exclude_docs = plugins.exclude_docs:Plugin",
+            "sharded_search = plugins.sharded_search:Plugin",
+            "build_profiler = plugins.build_profiler:Plugin",
+            "render_cache = plugins.render_cache:Plugin",
+            "partitioned_build = plugins.partitioned_build:Plugin",
+            "parallel_markdown = plugins.parallel_markdown:Plugin",
+            "serve_dependencies = plugins.serve_dependencies:Plugin",
+            "macro_bypass = plugins.macro_bypass:Plugin",
         ]
     },
+    package_data={"plugins": ["assets/*.js", "templates/*.html"]},
     include_package_data=True,
     zip_safe=False,
 )
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""generate_memos.py を memo_stub_command.py で動かす確認 (LLM CLI は呼ばない)。
+
+実行: python -m unittest discover -s tests (または python -m pytest tests)
+"""
+from __future__ import annotations
+
+import io
+import json
+import shlex
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+# docs/ の補助スクリプトは docs/ をカレントにして動かす前提で、互いをモジュール名だけで import する
+DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+if str(DOCS_DIR) not in sys.path:
+    sys.path.insert(0, str(DOCS_DIR))
+
+import generate_memos  # noqa: E402
+from memo_rules import is_within_check_range, weighted_length  # noqa: E402
+
+STUB = DOCS_DIR / "memo_stub_command.py"
+
+
+class GenerateMemosTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.root = base / "docs"
+        self.state_dir = base / "state"
+        self.journal = base / "memo_journal.jsonl"
+        for rel_path in ("2025-web/2025-01-05.md", "2025-web/2025-01-12.md", "2025-web/short-2025-01-19.md"):
+            md_path = self.root / rel_path
+            md_path.parent.mkdir(parents=True, exist_ok=True)
+            md_path.write_text(f"# {md_path.stem} の見出し\n\n本文。\n", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def run_main(self, *stub_args: str, extra=()) -> int:
+        command = " ".join(shlex.quote(part) for part in (sys.executable, str(STUB), "{md}", "{memo}", *stub_args))
+        argv = [str(self.root), "--command", command, "--jobs", "2", "--retries", "1", "--backoff", "0",
+                "--journal", str(self.journal), *extra]
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            return generate_memos.main(argv)
+
+    def states(self) -> dict:
+        states = {}
+        for line in self.journal.read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            states[record["path"]] = record
+        return states
+
+    def test_retry_resume_and_length_rejection(self) -> None:
+        short_path = self.root / "2025-web/short-2025-01-19.memo"
+
+        # 1 回目: 各ファイルの最初の実行は失敗して再試行で成功し、短すぎる memo は 2 回とも不合格になる
+        code = self.run_main("--fail-first", "1", "--state-dir", str(self.state_dir), "--short-match", "short-", extra=["--limit", "2"])
+        self.assertEqual(code, 0)
+        states = self.states()
+        self.assertEqual({path: record["status"] for path, record in states.items()},
+                         {"2025-web/2025-01-05.md": "done", "2025-web/2025-01-12.md": "done"})
+        self.assertTrue(all(record["attempts"] == 2 for record in states.values()))
+        for memo_path in self.root.glob("2025-web/2025-*.memo"):
+            self.assertTrue(is_within_check_range(weighted_length(memo_path.read_text(encoding="utf-8"))))
+
+        # 2 回目: 続きから処理し、短すぎる memo は消して failed を記録する
+        code = self.run_main("--short-match", "short-")
+        self.assertEqual(code, 1)
+        states = self.states()
+        self.assertEqual(states["2025-web/short-2025-01-19.md"]["status"], "failed")
+        self.assertIn("out of range", states["2025-web/short-2025-01-19.md"]["message"])
+        self.assertFalse(short_path.exists())
+        self.assertEqual(len(self.journal.read_text(encoding="utf-8").splitlines()), 3)
+
+        # 3 回目: failed のファイルは飛ばし、--retry-failed を付けると処理し直す
+        self.assertEqual(self.run_main(), 0)
+        self.assertFalse(short_path.exists())
+        self.assertEqual(self.run_main(extra=["--retry-failed"]), 0)
+        self.assertEqual(self.states()["2025-web/short-2025-01-19.md"]["status"], "done")
+        self.assertTrue(short_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,14 +4,84 @@
 - 各サブフォルダの .pages から `title: カテゴリ｜年月` を読み取り、カテゴリ毎にフォルダをグルーピング
 - 既存の docs/.pages が持つカテゴリ順を尊重しつつ、新規カテゴリは自動追加
 - 生成した nav 構造を Python リストで返したり、ファイルに書き出したりできる
+- フォルダ名と各 .pages の (mtime, size) をスナップショットとして docs_dir の外 (`.cache/`) に保存し、
+  変化が無ければカテゴリの再抽出も nav の再生成も省略する
 """
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 CATEGORY_EXCLUDE = {"assets", "stylesheets"}
+CACHE_DIRNAME = ".cache"
+SNAPSHOT_FILENAME = "root_nav.json"
+SNAPSHOT_VERSION = 1
+
+Signature = Optional[List[int]]
+
+
+@dataclass
+class ScanStats:
+    scan_seconds: float = 0.0
+    scanned_dirs: int = 0
+    category_hits: int = 0
+    category_misses: int = 0
+    nav_cache_hit: bool = False
+
+    def format(self) -> str:
+        nav_state = "hit" if self.nav_cache_hit else "miss"
+        return (
+            f"scan: {self.scan_seconds * 1000:.2f} ms, dirs: {self.scanned_dirs}, "
+            f"category cache: {self.category_hits} hits / {self.category_misses} misses, "
+            f"nav cache: {nav_state}"
+        )
+
+
+def file_signature(path: Path) -> Signature:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def snapshot_path_for(docs_dir: Path) -> Path:
+    return docs_dir.parent / CACHE_DIRNAME / SNAPSHOT_FILENAME
+
+
+def scan_category_dirs(docs_dir: Path) -> Dict[str, Signature]:
+    """os.scandir で docs 直下のフォルダを列挙し、フォルダ名 -> .pages の署名を返す。"""
+    dirs: Dict[str, Signature] = {}
+    with os.scandir(docs_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name in CATEGORY_EXCLUDE:
+                continue
+            if not entry.is_dir():
+                continue
+            dirs[entry.name] = file_signature(Path(entry.path) / ".pages")
+    return dict(sorted(dirs.items()))
+
+
+def load_snapshot(path: Path) -> Dict:
+    try:
+        snapshot = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return {}
+    return snapshot
+
+
+def save_snapshot(path: Path, snapshot: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
 
 
 def extract_category_from_pages(pages_path: Path) -> str | None:
@@ -31,20 +101,32 @@ def extract_category_from_pages(pages_path: Path) -> str | None:
     return None
 
 
-def collect_category_mapping(docs_dir: Path) -> Tuple[Dict[str, List[str]], List[str]]:
-    """カテゴリ -> フォルダ一覧、および検出順を返す。"""
+def collect_category_mapping(
+    docs_dir: Path,
+    dirs: Optional[Dict[str, Signature]] = None,
+    cached: Optional[Dict[str, Dict]] = None,
+    stats: Optional[ScanStats] = None,
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """カテゴリ -> フォルダ一覧、および検出順を返す。
+
+    `cached` にフォルダ毎の前回の署名とカテゴリがあれば、署名が一致する .pages は読み直さない。
+    """
+    if dirs is None:
+        dirs = scan_category_dirs(docs_dir)
+    cached = cached or {}
     mapping: Dict[str, List[str]] = {}
     discovered_order: List[str] = []
 
-    for child in sorted(docs_dir.iterdir(), key=lambda p: p.name):
-        if not child.is_dir():
-            continue
-        if child.name.startswith('.'):
-            continue
-        if child.name in CATEGORY_EXCLUDE:
-            continue
-
-        category = extract_category_from_pages(child / ".pages")
+    for name, signature in dirs.items():
+        previous = cached.get(name)
+        if signature is not None and previous and previous.get("sig") == signature:
+            category = previous.get("category")
+            if stats is not None:
+                stats.category_hits += 1
+        else:
+            category = extract_category_from_pages(docs_dir / name / ".pages") if signature is not None else None
+            if stats is not None:
+                stats.category_misses += 1
         if not category:
             continue
 
@@ -52,7 +134,7 @@ def collect_category_mapping(docs_dir: Path) -> Tuple[Dict[str, List[str]], List
             mapping[category] = []
             discovered_order.append(category)
 
-        mapping[category].append(child.name.replace('\\', '/'))
+        mapping[category].append(name.replace('\\', '/'))
 
     for paths in mapping.values():
         paths.sort(reverse=True)
@@ -116,11 +198,45 @@ def format_nav_as_pages(nav: List[object]) -> str:
     return "\n".join(lines) + "\n"
 
 
-def generate_navigation(docs_dir: Path) -> List[object]:
-    mapping, discovered_order = collect_category_mapping(docs_dir)
+def generate_navigation(docs_dir: Path, use_cache: bool = True, stats: Optional[ScanStats] = None) -> List[object]:
+    """nav 構造を生成する。スナップショットが一致すれば前回の nav をそのまま返す。"""
+    stats = stats if stats is not None else ScanStats()
+    started = time.perf_counter()
+    dirs = scan_category_dirs(docs_dir)
+    root_signature = file_signature(docs_dir / ".pages")
+    stats.scanned_dirs = len(dirs)
+
+    snapshot_path = snapshot_path_for(docs_dir)
+    snapshot = load_snapshot(snapshot_path) if use_cache else {}
+    cached_dirs: Dict[str, Dict] = snapshot.get("dirs", {})
+    if (
+        snapshot
+        and snapshot.get("root") == root_signature
+        and {name: entry.get("sig") for name, entry in cached_dirs.items()} == dirs
+    ):
+        stats.nav_cache_hit = True
+        stats.category_hits = len(dirs)
+        stats.scan_seconds = time.perf_counter() - started
+        return snapshot["nav"]
+
+    mapping, discovered_order = collect_category_mapping(docs_dir, dirs, cached_dirs, stats)
     existing_order = read_existing_category_order(docs_dir / ".pages")
     ordered_categories = build_order(mapping, discovered_order, existing_order)
-    return build_nav_structure(mapping, ordered_categories)
+    nav = build_nav_structure(mapping, ordered_categories)
+
+    if use_cache:
+        folder_category = {path: category for category, paths in mapping.items() for path in paths}
+        save_snapshot(snapshot_path, {
+            "version": SNAPSHOT_VERSION,
+            "root": root_signature,
+            "dirs": {
+                name: {"sig": signature, "category": folder_category.get(name)}
+                for name, signature in dirs.items()
+            },
+            "nav": nav,
+        })
+    stats.scan_seconds = time.perf_counter() - started
+    return nav
 
 
 def write_root_pages(docs_dir: Path, nav: List[object]) -> Path:
@@ -134,13 +250,18 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Generate root .pages nav from subfolders")
     parser.add_argument("docs_dir", nargs="?", default="docs", help="MkDocs docs directory")
     parser.add_argument("--print", action="store_true", help="Print nav structure instead of writing file")
+    parser.add_argument("--stats", action="store_true", help="Report scan time and cache hits")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the scan snapshot")
     args = parser.parse_args()
 
     docs_dir = Path(args.docs_dir).resolve()
     if not docs_dir.is_dir():
         raise SystemExit(f"Docs directory not found: {docs_dir}")
 
-    nav = generate_navigation(docs_dir)
+    stats = ScanStats()
+    nav = generate_navigation(docs_dir, use_cache=not args.no_cache, stats=stats)
+    if args.stats:
+        print(stats.format())
 
     if args.print:
         print(nav)